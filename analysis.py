@@ -0,0 +1,173 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from bitboard import (BOARD_CHARS, Position, get_opponent, parse_board, position_from_transcript, replay_moves,
+                      square_name, transcript_squares)
+from endgame import ENDGAME_EMPTIES
+from minimax_ai import MAX_DEPTH, SearchContext, evaluate_board, iterative_deepening, run_sync
+from move_ordering import MoveOrderer
+from transposition import TranspositionTable
+
+# Batch analysis for game review. Input is a stream of lines, one position per
+# line, either
+#   a move transcript from the initial position   f5d6c3d3c4
+#   a board of 64 squares plus the side to move  ---------------------------OX------XO--------------------------- X
+# (X / * black, O / o white, - / . empty, row by row from a1). Positions are
+# searched on a process pool and results come out as JSON lines in input
+# order. At most `window` positions are in flight at a time, so memory stays
+# flat however long the input is.
+
+ANALYSIS_TT_MB = 8  # per position; every search starts from an empty table
+WINDOW_PER_WORKER = 4
+
+
+def parse_board_line(text):
+    # "<64 squares> <side>" -> (position, to_move)
+    squares, _, side = text.partition(" ")
+    return parse_board(squares, side.strip())
+
+
+def parse_line(text):
+    # Either input format -> (position, to_move)
+    if all(c in BOARD_CHARS for c in text[:64]):
+        return parse_board_line(text)
+    return position_from_transcript(text)
+
+
+def game_positions(transcript):
+    # Every position of a game transcript: (ply, position, to_move, move played
+    # next or None). Passes are implicit, as in position_from_transcript.
+    for ply, (position, to_move, sq) in enumerate(replay_moves(transcript_squares(transcript))):
+        yield ply, position.copy(), to_move, square_name(sq) if sq is not None else None
+
+
+class Limits:
+    # Per-position search limits; picklable for the workers
+    def __init__(self, depth=MAX_DEPTH, time_limit=math.inf, endgame_empties=ENDGAME_EMPTIES):
+        self.depth = depth
+        self.time_limit = time_limit
+        self.endgame_empties = endgame_empties
+
+
+def analyse_position(black, white, to_move, limits):
+    # Best move and scores for the side to move. "score" is the search result
+    # (the final disc difference when solved exactly), "static" the plain
+    # evaluate_board value; both from the mover's side.
+    position = Position(black, white)
+    opponent = get_opponent(to_move)
+    result = dict(to_move=to_move, static=evaluate_board(position, to_move, opponent))
+    if not position.move_mask(to_move):
+        # Game over
+        black_discs, white_discs = position.get_score()
+        diff = black_discs - white_discs
+        result.update(best=None, score=diff if to_move == "black" else -diff, depth=0, endgame=True,
+                      nodes=0, time=0.0, pv=[])
+        return result
+
+    ctx = SearchContext(opponent, to_move, time.time(), limits.time_limit,
+                        TranspositionTable(ANALYSIS_TT_MB), MoveOrderer(), limits.endgame_empties)
+    ctx.cooperative = False
+    score, move, stats = run_sync(iterative_deepening(ctx, position, limits.depth))
+    result.update(best=square_name(move[0] * 8 + move[1]), score=score, depth=stats.depth, endgame=stats.endgame,
+                  nodes=stats.nodes, time=round(stats.elapsed, 3), pv=[square_name(sq) for sq in stats.pv])
+    return result
+
+
+def _finished(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _analyse_task(fields, black, white, to_move, limits):
+    result = dict(fields)
+    result.update(analyse_position(black, white, to_move, limits))
+    return result
+
+
+def _submit_line(executor, number, text, limits, every_ply):
+    # Futures for one input line, in output order
+    fields = dict(line=number, input=text)
+    try:
+        if every_ply:
+            # Parse the whole game first, so a bad move is reported once
+            positions = list(game_positions(text))
+        else:
+            position, to_move = parse_line(text)
+    except ValueError as exc:
+        return [_finished(dict(fields, error=str(exc)))]
+    if not every_ply:
+        return [executor.submit(_analyse_task, fields, position.black, position.white, to_move, limits)]
+    return [executor.submit(_analyse_task, dict(fields, ply=ply, played=played),
+                            position.black, position.white, to_move, limits)
+            for ply, position, to_move, played in positions]
+
+
+def analyse_stream(lines, limits=None, workers=None, window=None, every_ply=False):
+    # Yields one result dict per position, in input order, while later
+    # positions are still being searched. Blank lines and "#" comments are
+    # skipped. With every_ply, each line is a game transcript and every
+    # position along it is analysed (one result per ply, "played" being the
+    # move the game continued with).
+    limits = limits or Limits()
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * WINDOW_PER_WORKER
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        pending = deque()
+        for number, line in enumerate(lines, 1):
+            text = line.strip()
+            if not text or text.startswith("#"):
+                continue
+            pending.extend(_submit_line(executor, number, text, limits, every_ply))
+            # The oldest result is the next one due, so wait for it before
+            # reading more input
+            while len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analyse positions in bulk: best move and evaluation for each, as JSON lines in input order",
+        epilog="Input lines are move transcripts (f5d6c3) or 64 squares of X/O/- followed by the side to move.")
+    parser.add_argument("input", nargs="?", default="-", help="file with one position per line (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--depth", type=int, default=None, help="search depth per position")
+    parser.add_argument("--time", type=float, default=None, help="seconds per position")
+    parser.add_argument("--endgame", type=int, default=ENDGAME_EMPTIES, help="solve exactly at this many empties")
+    parser.add_argument("--every-ply", action="store_true", help="analyse every position of each game transcript")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--window", type=int, default=None,
+                        help=f"positions in flight at once (default: {WINDOW_PER_WORKER} per worker)")
+    args = parser.parse_args()
+    if args.depth is None and args.time is None:
+        parser.error("give --depth, --time or both")
+
+    limits = Limits(args.depth or MAX_DEPTH, args.time or math.inf, args.endgame)
+    source = sys.stdin if args.input == "-" else open(args.input)
+    sink = sys.stdout if args.output == "-" else open(args.output, "w")
+    start, count = time.time(), 0
+    try:
+        for result in analyse_stream(source, limits, args.workers, args.window, args.every_ply):
+            sink.write(json.dumps(result) + "\n")
+            sink.flush()
+            count += 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    elapsed = time.time() - start
+    print(f"{count} positions in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.1f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
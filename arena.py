@@ -0,0 +1,263 @@
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from bitboard import Position, get_opponent
+from endgame import ENDGAME_EMPTIES
+from minimax_ai import MAX_DEPTH, SEARCH_MODES, SearchContext, iterative_deepening, run_sync
+from move_ordering import MoveOrderer
+from transposition import TranspositionTable
+
+# Headless engine-vs-engine matches. Every opening is played twice with the
+# colours swapped, games run in parallel on a process pool, and the result is
+# reported from engine A's side.
+
+ARENA_TT_MB = 4  # per engine per game; games are short and run side by side
+
+
+def default_endgame(time_limit):
+    # Exact-endgame threshold when none is given: the usual one when the
+    # solver has a deadline, off for depth-only engines
+    return ENDGAME_EMPTIES if time_limit != math.inf else 0
+
+
+class EngineConfig:
+    # One engine setting: search depth, time per move, exact-endgame threshold,
+    # evaluate_board weights (None for the built-in PHASE_WEIGHTS) and search mode
+
+    def __init__(self, name, depth=MAX_DEPTH, time_limit=math.inf, endgame_empties=None, weights=None,
+                 search="alphabeta"):
+        self.name = name
+        self.depth = depth
+        self.time_limit = time_limit
+        self.endgame_empties = default_endgame(time_limit) if endgame_empties is None else endgame_empties
+        self.weights = weights
+        self.search = search
+
+    @classmethod
+    def parse(cls, spec):
+        # "name:key=value,key=value", e.g. "d4:depth=4,endgame=10" or
+        # "fast:time=0.05". weights takes 15 numbers separated by "/",
+        # opening then mid-game then endgame.
+        name, _, options = spec.partition(":")
+        config = cls(name)
+        config.endgame_empties = None
+        for option in filter(None, options.split(",")):
+            key, _, value = option.partition("=")
+            if key == "depth":
+                config.depth = int(value)
+            elif key == "time":
+                config.time_limit = float(value)
+            elif key == "endgame":
+                config.endgame_empties = int(value)
+            elif key == "weights":
+                numbers = [int(w) for w in value.split("/")]
+                if len(numbers) != 15:
+                    raise ValueError(f"weights needs 15 values, got {len(numbers)}")
+                config.weights = tuple(tuple(numbers[i:i + 5]) for i in range(0, 15, 5))
+            elif key == "search":
+                if value not in SEARCH_MODES:
+                    raise ValueError(f"search must be one of {SEARCH_MODES}, got {value!r}")
+                config.search = value
+            else:
+                raise ValueError(f"unknown engine option {key!r} in {spec!r}")
+        if config.depth == MAX_DEPTH and config.time_limit == math.inf:
+            raise ValueError(f"engine {name!r} needs a depth or a time limit")
+        if config.endgame_empties is None:
+            config.endgame_empties = default_endgame(config.time_limit)
+        return config
+
+    def __repr__(self):
+        parts = []
+        if self.depth != MAX_DEPTH:
+            parts.append(f"depth={self.depth}")
+        if self.time_limit != math.inf:
+            parts.append(f"time={self.time_limit}")
+        parts.append(f"endgame={self.endgame_empties}")
+        if self.weights is not None:
+            parts.append("weights=" + "/".join(str(w) for phase in self.weights for w in phase))
+        if self.search != "alphabeta":
+            parts.append(f"search={self.search}")
+        return f"{self.name}:{','.join(parts)}"
+
+
+def random_opening(rng, plies):
+    # Position after `plies` random legal moves (passes are skipped), used so
+    # deterministic engines do not replay the same game
+    position, to_move = Position.initial(), "black"
+    for _ in range(plies):
+        moves = position.get_valid_moves(to_move)
+        if not moves:
+            break
+        position.make_move(*rng.choice(moves), to_move)
+        to_move = get_opponent(to_move)
+        if not position.move_mask(to_move):
+            to_move = get_opponent(to_move)
+    return position, to_move
+
+
+def play_game(black, white, opening_black, opening_white, to_move):
+    # Plays one game between two EngineConfigs from the given start position.
+    # Returns (final disc difference for black, moves, {color: (nodes, seconds)}).
+    position = Position(opening_black, opening_white)
+    engines = {
+        "black": (black, TranspositionTable(ARENA_TT_MB), MoveOrderer()),
+        "white": (white, TranspositionTable(ARENA_TT_MB), MoveOrderer()),
+    }
+    stats = {"black": [0, 0.0], "white": [0, 0.0]}
+    moves = 0
+
+    while True:
+        if not position.move_mask(to_move):
+            to_move = get_opponent(to_move)
+            if not position.move_mask(to_move):
+                break  # neither side can move
+
+        config, tt, orderer = engines[to_move]
+        ctx = SearchContext(get_opponent(to_move), to_move, time.time(), config.time_limit, tt, orderer,
+                            config.endgame_empties)
+        ctx.cooperative = False
+        ctx.weights = config.weights
+        ctx.search = config.search
+        _, move, _ = run_sync(iterative_deepening(ctx, position, config.depth))
+        stats[to_move][0] += ctx.stats.nodes
+        stats[to_move][1] += time.time() - ctx.start_time
+
+        position.make_move(move[0], move[1], to_move)
+        moves += 1
+        to_move = get_opponent(to_move)
+
+    black_discs, white_discs = position.get_score()
+    return black_discs - white_discs, moves, {color: tuple(s) for color, s in stats.items()}
+
+
+def _play_pair_game(game_index, engine_a, engine_b, opening):
+    # Even games give engine A black, odd games give it white
+    black, white = (engine_a, engine_b) if game_index % 2 == 0 else (engine_b, engine_a)
+    disc_diff, moves, stats = play_game(black, white, *opening)
+    a_color = "black" if game_index % 2 == 0 else "white"
+    b_color = get_opponent(a_color)
+    a_diff = disc_diff if a_color == "black" else -disc_diff
+    return game_index, a_diff, moves, stats[a_color], stats[b_color]
+
+
+# --- Match statistics ---
+
+def elo_difference(score):
+    # Elo difference implied by an expected score in (0, 1)
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1) + 0.0  # no "-0"
+
+
+def elo_with_error(wins, draws, losses, z=1.96):
+    # Elo difference for A and the half-width of its 95% interval, from the
+    # standard error of the per-game score carried through the Elo curve
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    if score in (0, 1):
+        return elo_difference(score), math.inf
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    slope = 400 / math.log(10) / (score * (1 - score))
+    return elo_difference(score), z * math.sqrt(variance / games) * slope
+
+
+class MatchResult:
+    def __init__(self, engine_a, engine_b):
+        self.engine_a = engine_a
+        self.engine_b = engine_b
+        self.wins = self.draws = self.losses = 0
+        self.disc_total = 0
+        self.moves = 0
+        self.nodes = {"a": 0, "b": 0}
+        self.search_time = {"a": 0.0, "b": 0.0}
+        self.elapsed = 0.0
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def add(self, a_diff, moves, a_stats, b_stats):
+        if a_diff > 0:
+            self.wins += 1
+        elif a_diff < 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+        self.disc_total += a_diff
+        self.moves += moves
+        for side, (nodes, seconds) in (("a", a_stats), ("b", b_stats)):
+            self.nodes[side] += nodes
+            self.search_time[side] += seconds
+
+    def summary(self):
+        lines = [f"{self.engine_a!r} vs {self.engine_b!r}: {self.games} games"]
+        if not self.games:
+            return "\n".join(lines)
+        elo, error = elo_with_error(self.wins, self.draws, self.losses)
+        lines.append(f"  A wins {self.wins}, draws {self.draws}, losses {self.losses} "
+                     f"(score {(self.wins + self.draws / 2) / self.games:.1%}, "
+                     f"mean disc diff {self.disc_total / self.games:+.1f})")
+        lines.append(f"  Elo difference {elo:+.0f} +/- {error:.0f} (95%)")
+        lines.append(f"  {self.games / self.elapsed:.2f} games/sec, {self.moves / self.games:.1f} moves/game")
+        for side, engine in (("a", self.engine_a), ("b", self.engine_b)):
+            seconds = self.search_time[side]
+            rate = self.nodes[side] / seconds if seconds else 0
+            lines.append(f"  {engine.name}: {self.nodes[side]} nodes, {rate:,.0f} nodes/sec")
+        return "\n".join(lines)
+
+
+def run_match(engine_a, engine_b, pairs=100, random_plies=6, workers=None, seed=0, on_game=None):
+    # Plays 2 * pairs games across a process pool. on_game(result) is called
+    # after every finished game, e.g. for progress output.
+    rng = random.Random(seed)
+    openings = []
+    for _ in range(pairs):
+        position, to_move = random_opening(rng, random_plies)
+        openings.append((position.black, position.white, to_move))
+
+    result = MatchResult(engine_a, engine_b)
+    workers = workers or os.cpu_count() or 1
+    start = time.time()
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        futures = [executor.submit(_play_pair_game, i, engine_a, engine_b, openings[i // 2])
+                   for i in range(2 * pairs)]
+        for future in as_completed(futures):
+            _, a_diff, moves, a_stats, b_stats = future.result()
+            result.add(a_diff, moves, a_stats, b_stats)
+            result.elapsed = time.time() - start
+            if on_game is not None:
+                on_game(result)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play two engine configurations against each other without a display",
+        epilog='Engines are given as "name:option=value,...", options depth, time (seconds per move), '
+               f'endgame (exact-solve empties; default {ENDGAME_EMPTIES} with a time limit, 0 without), '
+               'weights (15 values joined by "/") and search (alphabeta or pvs).')
+    parser.add_argument("engine_a", type=EngineConfig.parse, help='e.g. "new:depth=4"')
+    parser.add_argument("engine_b", type=EngineConfig.parse, help='e.g. "old:depth=3"')
+    parser.add_argument("--pairs", type=int, default=100, help="openings; each is played with both colours")
+    parser.add_argument("--random-plies", type=int, default=6, help="random moves before the engines take over")
+    parser.add_argument("--workers", type=int, default=None, help="parallel games (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    def progress(result):
+        if result.games % 20 == 0:
+            print(f"{result.games}/{2 * args.pairs} games: +{result.wins} ={result.draws} -{result.losses}")
+
+    result = run_match(args.engine_a, args.engine_b, args.pairs, args.random_plies, args.workers, args.seed, progress)
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+try:
+    import numpy as np
+except ImportError as exc:
+    raise ImportError("batch_eval needs NumPy >= 2.0: pip install numpy, or install the 'analysis' extra") from exc
+from bitboard import LEFT_SHIFTS, RIGHT_SHIFTS, as_position
+from minimax_ai import PHASE_WEIGHTS
+from patterns import CORNER_MASK, CORNER_NEIGHBOURS, EDGE_MASK
+
+# Vectorized evaluate_board for many positions at once. Positions are (N, 8, 8)
+# int8 arrays with 1 for black, -1 for white and 0 for empty; internally each
+# side becomes a uint64 bitboard per position and every feature is computed
+# with array-wide shifts, masks and popcounts. Scores match evaluate_board
+# exactly.
+
+BLACK, WHITE, EMPTY = 1, -1, 0
+SIDES = {"black": BLACK, "white": WHITE}
+
+_LEFT_SHIFTS = [(np.uint64(shift), np.uint64(mask)) for shift, mask in LEFT_SHIFTS]
+_RIGHT_SHIFTS = [(np.uint64(shift), np.uint64(mask)) for shift, mask in RIGHT_SHIFTS]
+_CORNER_MASK = np.uint64(CORNER_MASK)
+_EDGE_MASK = np.uint64(EDGE_MASK)
+_CORNER_NEIGHBOURS = [(np.uint64(corner), np.uint64(nearby)) for corner, nearby in CORNER_NEIGHBOURS]
+_FULL = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def boards_to_array(boards):
+    # Positions or list boards -> (N, 8, 8) int8 array
+    positions = [as_position(board) for board in boards]
+    black = np.array([p.black for p in positions], dtype=np.uint64)
+    white = np.array([p.white for p in positions], dtype=np.uint64)
+    return bitboards_to_array(black, white)
+
+
+def array_to_bitboards(boards):
+    # (N, 8, 8) int8 -> (black, white) uint64 arrays; bit row * 8 + col
+    flat = np.asarray(boards).reshape(-1, 64)
+    black = np.packbits(flat == BLACK, axis=1, bitorder="little").view("<u8").ravel()
+    white = np.packbits(flat == WHITE, axis=1, bitorder="little").view("<u8").ravel()
+    return black, white
+
+
+def bitboards_to_array(black, white):
+    bits = np.arange(64, dtype=np.uint64)
+    black_squares = (black[:, None] >> bits) & np.uint64(1)
+    white_squares = (white[:, None] >> bits) & np.uint64(1)
+    return (black_squares.astype(np.int8) - white_squares.astype(np.int8)).reshape(-1, 8, 8)
+
+
+def legal_moves_batch(own, opp):
+    # bitboard.legal_moves on arrays; uint64 shifts drop bits off the board edge
+    empty = ~(own | opp) & _FULL
+    moves = np.zeros_like(own)
+
+    for shift, mask in _LEFT_SHIFTS:
+        o = opp & mask
+        x = (own << shift) & o
+        for _ in range(5):
+            x |= (x << shift) & o
+        moves |= (x << shift) & mask & empty
+
+    for shift, mask in _RIGHT_SHIFTS:
+        o = opp & mask
+        x = (own >> shift) & o
+        for _ in range(5):
+            x |= (x >> shift) & o
+        moves |= (x >> shift) & mask & empty
+
+    return moves
+
+
+def _popcount(x):
+    return np.bitwise_count(x).astype(np.int64)
+
+
+def phase_indexes(own, opp):
+    # evaluate_board's game phase (0, 1, 2) of each position
+    phase = _popcount(own | opp) / 64.0
+    return np.where(phase < 0.4, 0, np.where(phase < 0.8, 1, 2))
+
+
+def features_bitboards(own, opp):
+    # (N, 5) int64 features for the side owning `own`, in PHASE_WEIGHTS order;
+    # the nearby-corners column is negated, so every weight adds
+    piece_diff = _popcount(own) - _popcount(opp)
+    mobility = _popcount(legal_moves_batch(own, opp)) - _popcount(legal_moves_batch(opp, own))
+    corner_control = _popcount(own & _CORNER_MASK) - _popcount(opp & _CORNER_MASK)
+    edge_control = _popcount(own & _EDGE_MASK) - _popcount(opp & _EDGE_MASK)
+
+    nearby_corners = np.zeros_like(piece_diff)
+    for corner, nearby in _CORNER_NEIGHBOURS:
+        # Only penalize nearby squares if the corner is NOT owned by that side
+        nearby_corners += np.where(own & corner, 0, _popcount(own & nearby))
+        nearby_corners -= np.where(opp & corner, 0, _popcount(opp & nearby))
+
+    return np.stack([piece_diff, mobility, corner_control, edge_control, -nearby_corners], axis=1)
+
+
+def evaluate_bitboards(own, opp, weights=None):
+    # evaluate_board for the side owning `own`, over uint64 arrays
+    weights = np.asarray(PHASE_WEIGHTS if weights is None else weights, dtype=np.int64)
+    w = weights[phase_indexes(own, opp)]
+    return (w * features_bitboards(own, opp)).sum(axis=1)
+
+
+def evaluate_batch(boards, ai_color="black", weights=None):
+    # Scores for an (N, 8, 8) int8 array. ai_color is "black", "white", or an
+    # (N,) array of 1 / -1 giving the scoring side of each position.
+    black, white = array_to_bitboards(boards)
+    side = SIDES[ai_color] if isinstance(ai_color, str) else np.asarray(ai_color)
+    black_side = side == BLACK
+    return evaluate_bitboards(np.where(black_side, black, white), np.where(black_side, white, black), weights)
@@ -0,0 +1,415 @@
+import argparse
+import asyncio
+import json
+import math
+import platform
+import os
+import random
+import subprocess
+import sys
+import time
+from bitboard import Position, get_opponent, iter_squares, position_from_transcript, square_name
+from endgame import solve_endgame
+from minimax_ai import (SEARCH_MODES, SearchContext, evaluate_board, iterative_deepening, run_sync,
+                        shutdown_executor, start_minimax_async, start_minimax_parallel)
+from move_ordering import MoveOrderer
+from transposition import TranspositionTable
+
+# Modules a search worker or batch tool may import; none of them may pull in
+# pygame. main is the GUI entry point, which spawned workers re-import.
+ENGINE_MODULES = [
+    "bitboard", "board", "game_state", "history", "transposition", "move_ordering", "patterns", "endgame",
+    "search_stats", "minimax_ai", "game_record", "opening_book", "main",
+]
+
+# Fixed position set: move transcripts from the initial position, ranging from
+# the early midgame (12 plies) to the late midgame (40 plies).
+BENCH_POSITIONS = [
+    "d3c5e6e3b5d2e2d6c6f4d1b7",
+    "e6f4c3c4d3d6e3f6b3b4f3e2g7b2a3f2",
+    "d3c5c6c7e6f3f4d2c4c3b6a5f2g2h2f1b2b3b7f5",
+    "d3c5e6f3b5c4c3e7f7a5d6c2f8g8f6e8b2g5g6e3b4a3d7h6",
+    "f5f4e3d6g4f3f2h4h3g2h5d3c4g6e2e1c6b6b7a8d7g5f6c3b5h6b8c5",
+    "c4e3f6b4f3g7a4c5e2f2g2a3d3h1c6b5g3d2a6b3d1c7e6g4b2a2d7e7g1f7h3c2",
+    "c4c5d6c7f5f4b6f6e6c3e7b4d3f8c6a7b8c8d8f7a6e3c2a5g8g7g3b3g5h5a3f3b2c1g2d7",
+    "e6f6g6e7d8h6f5d3g7d6c7f8c3c6e3f4c5f7g4b4g5d7h8d2b2g3c4h7g8e8h3a1d1c8f2h4b8e2b3c2",
+]
+
+# Endgame positions with 10, 12, 14 and 16 empty squares
+ENDGAME_POSITIONS = [
+    "e6d6c4f6d7c3d3e3c2b5c5d8f7b2c6c7b3e7b7c8e2a8b8f3b6d2a2f8g6f1a6f5g2a7e1h7g7g3g1a3g8a1h5h1g4a5f2h6h8h2",
+    "e6f4e3f2c3c5b5f6d3b6c4b2e2e1b3d6g7f5b1a5g1c2g4g6d1g3g5a2c6h6a4a1e7f3c7d7h7e8f8a3b4h8b7c1g2g8d8h3",
+    "e6f4c3c4d3c6g3d2b4f3e1f7e3b3e7g2a3a2c5h3h1b5a5f1a1a4a6b6g7f5g6g5h6g4a7d1b2c2h5h7d7h4e2g8g1f6",
+    "d3c5d6e3b4c7f5f4f2g5h6c3b3g4e6d7f7b6e7c2g3f6c4d8c8b8e8e2d2f3a8c6b2h4a7a2g6a1b7g2f1h3d1g8",
+]
+
+# Move-ordering stages, switched on one at a time
+ORDERING_CONFIGS = [
+    ("row-major", dict(hash_move=False, killers=False, history=False, static=False)),
+    ("static", dict(hash_move=False, killers=False, history=False)),
+    ("+history", dict(hash_move=False, killers=False)),
+    ("+killers", dict(hash_move=False)),
+    ("+hash move", dict()),
+    ("+shallow root", dict(shallow_plies=1, evaluate=evaluate_board)),
+]
+
+
+def search_position(transcript, depth, orderer=None):
+    # Iterative deepening to a fixed depth with no time limit; returns the context
+    position, to_move = position_from_transcript(transcript)
+    ctx = SearchContext(get_opponent(to_move), to_move, time.time(), math.inf, TranspositionTable(), orderer)
+    ctx.cooperative = False
+    run_sync(iterative_deepening(ctx, position, depth))
+    return ctx
+
+
+# Leaf counts from the initial position; passes count as a ply, finished
+# games as a single leaf
+PERFT_COUNTS = [1, 4, 12, 56, 244, 1396, 8200, 55092, 390216, 3005288, 24571284]
+
+
+def perft(position, to_move, depth, passed=False):
+    if depth == 0:
+        return 1
+    moves = position.move_mask(to_move)
+    opponent = get_opponent(to_move)
+    if not moves:
+        if passed:
+            return 1  # game over
+        return perft(position, opponent, depth - 1, True)
+    nodes = 0
+    for sq in iter_squares(moves):
+        flips = position.play(sq, to_move)
+        nodes += perft(position, opponent, depth - 1)
+        position.undo(sq, to_move, flips)
+    return nodes
+
+
+def ordering_report(depth):
+    print(f"Nodes searched to depth {depth} over {len(BENCH_POSITIONS)} positions")
+    print(f"{'ordering':<14} {'nodes':>10} {'vs row-major':>13} {'time':>8}")
+    baseline = None
+    for name, options in ORDERING_CONFIGS:
+        start = time.time()
+        nodes = sum(search_position(t, depth, MoveOrderer(**options)).stats.nodes for t in BENCH_POSITIONS)
+        elapsed = time.time() - start
+        if baseline is None:
+            baseline = nodes
+        print(f"{name:<14} {nodes:>10} {nodes / baseline - 1:>+13.1%} {elapsed:>7.2f}s")
+
+
+def speed_report(depth):
+    nodes = 0
+    start = time.time()
+    for transcript in BENCH_POSITIONS:
+        nodes += search_position(transcript, depth).stats.nodes
+    elapsed = time.time() - start
+    print(f"Depth {depth} over {len(BENCH_POSITIONS)} positions: {nodes} nodes in {elapsed:.2f}s "
+          f"({nodes / elapsed:,.0f} nodes/sec)")
+
+
+def search_mode_report(depth):
+    # Node counts of each search mode at the same depth, checked against the
+    # alpha-beta result
+    positions = [position_from_transcript(t) for t in BENCH_POSITIONS]
+    print(f"Depth {depth} over {len(positions)} positions")
+    print(f"{'search':<10} {'nodes':>10} {'vs alphabeta':>13} {'time':>8} {'same score':>11} {'same move':>10}")
+    expected = None
+    for mode in SEARCH_MODES:
+        start = time.time()
+        results = [asyncio.run(start_minimax_async(p, get_opponent(m), m, math.inf, depth, search=mode))
+                   for p, m in positions]
+        elapsed = time.time() - start
+        nodes = sum(stats.nodes for _, _, stats in results)
+        if expected is None:
+            expected, baseline = results, nodes
+        same_score = sum(r[0] == e[0] for r, e in zip(results, expected))
+        same_move = sum(r[1] == e[1] for r, e in zip(results, expected))
+        print(f"{mode:<10} {nodes:>10} {nodes / baseline - 1:>+13.1%} {elapsed:>7.2f}s "
+              f"{same_score:>5}/{len(positions):<5} {same_move:>4}/{len(positions):<5}")
+
+
+def parallel_report(depth, worker_counts):
+    # Time to depth for the root-splitting search, checked against the
+    # sequential search at the same depth
+    positions = [position_from_transcript(t) for t in BENCH_POSITIONS]
+    start = time.time()
+    expected = [asyncio.run(start_minimax_async(p, get_opponent(m), m, math.inf, depth)) for p, m in positions]
+    sequential = time.time() - start
+    print(f"Depth {depth} over {len(positions)} positions; sequential search {sequential:.2f}s")
+    print(f"{'workers':>7} {'time':>8} {'speedup':>8} {'same score':>11} {'same move':>10}")
+
+    for workers in worker_counts:
+        # Warm up so process start-up is not part of the timing
+        asyncio.run(start_minimax_parallel(positions[0][0], get_opponent(positions[0][1]), positions[0][1],
+                                           math.inf, 1, workers=workers))
+        start = time.time()
+        results = [asyncio.run(start_minimax_parallel(p, get_opponent(m), m, math.inf, depth, workers=workers))
+                   for p, m in positions]
+        elapsed = time.time() - start
+        same_score = sum(r[0] == e[0] for r, e in zip(results, expected))
+        same_move = sum(r[1] == e[1] for r, e in zip(results, expected))
+        print(f"{workers:>7} {elapsed:>7.2f}s {sequential / elapsed:>7.2f}x {same_score:>5}/{len(positions):<5} "
+              f"{same_move:>4}/{len(positions):<5}")
+    shutdown_executor()
+
+
+def endgame_report(max_empties, exact):
+    print(f"{'empties':>7} {'score':>6} {'move':>5} {'nodes':>10} {'time':>8} {'nodes/sec':>10}")
+    for transcript in ENDGAME_POSITIONS:
+        position, to_move = position_from_transcript(transcript)
+        empties = 64 - position.num_discs()
+        if empties > max_empties:
+            continue
+        start = time.time()
+        score, move, nodes = solve_endgame(position, to_move, exact)
+        elapsed = time.time() - start
+        move_name = square_name(move[0] * 8 + move[1]) if move else "pass"
+        print(f"{empties:>7} {score:>+6} {move_name:>5} {nodes:>10} {elapsed:>7.2f}s {nodes / elapsed:>10,.0f}")
+
+
+def import_time(module, repeats=5):
+    # Fastest of several imports, each in a fresh interpreter, in ms, and
+    # whether the import loaded pygame
+    code = ("import sys, time; start = time.perf_counter(); import " + module +
+            "; print(time.perf_counter() - start, 'pygame' in sys.modules)")
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        runs.append((float(out[-2]) * 1000, out[-1] == "True"))
+    return min(runs)
+
+
+WORKER_START_CODE = """
+import multiprocessing, time
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import Position
+from minimax_ai import evaluate_board
+times = []
+for _ in range({repeats}):
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        executor.submit(evaluate_board, Position.initial(), "black", "white").result()
+        times.append(time.perf_counter() - start)
+print(min(times))
+"""
+
+
+def worker_start_time(repeats=3):
+    # Time from creating a spawn process pool to the first evaluation coming
+    # back, in ms. It runs from a -c script, which workers do not re-import,
+    # so only the engine modules count, as for the GUI's workers.
+    out = subprocess.run([sys.executable, "-c", WORKER_START_CODE.format(repeats=repeats)], capture_output=True,
+                         text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return float(out) * 1000
+
+
+def imports_report(repeats):
+    # Import cost of every engine module; fails if one of them loads pygame
+    print(f"{'module':<14} {'import':>9} {'pygame':>7}")
+    baseline, _ = import_time("sys", repeats)
+    failures = []
+    for module in ["pygame"] + ENGINE_MODULES:
+        ms, loads_pygame = import_time(module, repeats)
+        print(f"{module:<14} {ms - baseline:>7.1f}ms {'yes' if loads_pygame else 'no':>7}")
+        if loads_pygame and module != "pygame":
+            failures.append(module)
+    print(f"Worker start-up (spawn to first result): {worker_start_time(repeats):.0f}ms")
+    for module in failures:
+        print(f"FAIL: {module} imports pygame")
+    return not failures
+
+
+def batch_eval_report(count, seed=0):
+    # evaluate_board one position at a time versus batch_eval on the same
+    # random positions; the scores must be identical
+    from arena import random_opening
+    from batch_eval import boards_to_array, evaluate_batch
+
+    rng = random.Random(seed)
+    positions = [random_opening(rng, rng.randrange(61))[0] for _ in range(count)]
+    boards = boards_to_array(positions)
+
+    start = time.time()
+    expected = [evaluate_board(p, "black", "white") for p in positions]
+    scalar = time.time() - start
+    start = time.time()
+    scores = evaluate_batch(boards, "black")
+    batched = time.time() - start
+
+    mismatches = sum(int(a) != b for a, b in zip(scores, expected))
+    print(f"{count} positions: evaluate_board {count / scalar:,.0f}/sec, evaluate_batch {count / batched:,.0f}/sec "
+          f"({scalar / batched:.0f}x), {mismatches} mismatches")
+
+
+# --- Benchmark suite ---
+# Perft, fixed-depth midgame searches and exact endgame solves, written as
+# JSON. Against a stored baseline a run fails when any section's nodes/sec
+# drops by more than the allowed percentage, or when perft counts are wrong.
+
+def perft_section(depth):
+    start = time.time()
+    nodes = perft(Position.initial(), "black", depth)
+    elapsed = time.time() - start
+    expected = PERFT_COUNTS[depth] if depth < len(PERFT_COUNTS) else None
+    return dict(depth=depth, nodes=nodes, expected=expected, seconds=elapsed, nodes_per_sec=nodes / elapsed)
+
+
+def midgame_section(depth):
+    results = []
+    for transcript in BENCH_POSITIONS:
+        position, to_move = position_from_transcript(transcript)
+        ctx = SearchContext(get_opponent(to_move), to_move, time.time(), math.inf, TranspositionTable())
+        ctx.cooperative = False
+        iteration_times = []
+        ctx.on_iteration = lambda d, score, move: iteration_times.append(time.time() - ctx.start_time)
+        score, move, _ = run_sync(iterative_deepening(ctx, position, depth))
+        results.append(dict(transcript=transcript, nodes=ctx.stats.nodes, seconds=iteration_times[-1], score=score,
+                            move=square_name(move[0] * 8 + move[1]), time_to_depth=iteration_times))
+    return _section_totals(dict(depth=depth, positions=results))
+
+
+def endgame_section(max_empties):
+    results = []
+    for transcript in ENDGAME_POSITIONS:
+        position, to_move = position_from_transcript(transcript)
+        empties = 64 - position.num_discs()
+        if empties > max_empties:
+            continue
+        start = time.time()
+        score, move, nodes = solve_endgame(position, to_move)
+        results.append(dict(transcript=transcript, empties=empties, nodes=nodes, seconds=time.time() - start,
+                            score=score, move=square_name(move[0] * 8 + move[1]) if move else None))
+    return _section_totals(dict(max_empties=max_empties, positions=results))
+
+
+def _section_totals(section):
+    section["nodes"] = sum(p["nodes"] for p in section["positions"])
+    section["seconds"] = sum(p["seconds"] for p in section["positions"])
+    section["nodes_per_sec"] = section["nodes"] / section["seconds"] if section["seconds"] else 0
+    return section
+
+
+def run_suite(perft_depth, search_depth, max_empties):
+    return dict(
+        python=platform.python_version(),
+        machine=platform.machine(),
+        perft=perft_section(perft_depth),
+        midgame=midgame_section(search_depth),
+        endgame=endgame_section(max_empties),
+    )
+
+
+def check_suite(results, baseline=None, max_regression=10.0):
+    # Returns a list of failure messages; empty means the run passed
+    failures = []
+    perft_result = results["perft"]
+    if perft_result["expected"] is not None and perft_result["nodes"] != perft_result["expected"]:
+        failures.append(f"perft({perft_result['depth']}) = {perft_result['nodes']}, expected {perft_result['expected']}")
+    if baseline is None:
+        return failures
+
+    for name in ("perft", "midgame", "endgame"):
+        old, new = baseline.get(name), results[name]
+        if not old or not old["nodes_per_sec"]:
+            continue
+        change = new["nodes_per_sec"] / old["nodes_per_sec"] - 1
+        if change < -max_regression / 100:
+            failures.append(f"{name}: {new['nodes_per_sec']:,.0f} nodes/sec is {-change:.1%} below the baseline "
+                            f"{old['nodes_per_sec']:,.0f} (allowed {max_regression:g}%)")
+    return failures
+
+
+def suite_report(results, baseline=None):
+    perft_result = results["perft"]
+    print(f"perft({perft_result['depth']}): {perft_result['nodes']} leaves in {perft_result['seconds']:.2f}s "
+          f"({perft_result['nodes_per_sec']:,.0f} nodes/sec)")
+    midgame = results["midgame"]
+    print(f"midgame depth {midgame['depth']}: {midgame['nodes']} nodes in {midgame['seconds']:.2f}s "
+          f"({midgame['nodes_per_sec']:,.0f} nodes/sec)")
+    for p in midgame["positions"]:
+        depth_times = " ".join(f"{t:.2f}" for t in p["time_to_depth"])
+        print(f"  {len(p['transcript']) // 2:>2} plies  {p['move']}  {p['score']:>+5}  {p['nodes']:>8} nodes  "
+              f"time to depth: {depth_times}")
+    endgame = results["endgame"]
+    print(f"endgame <= {endgame['max_empties']} empties: {endgame['nodes']} nodes in {endgame['seconds']:.2f}s "
+          f"({endgame['nodes_per_sec']:,.0f} nodes/sec)")
+    if baseline is not None:
+        for name in ("perft", "midgame", "endgame"):
+            if baseline.get(name) and baseline[name]["nodes_per_sec"]:
+                change = results[name]["nodes_per_sec"] / baseline[name]["nodes_per_sec"] - 1
+                print(f"  {name} vs baseline: {change:+.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Othello engine benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ordering = commands.add_parser("ordering", help="node counts for each move-ordering stage")
+    ordering.add_argument("--depth", type=int, default=5)
+
+    speed = commands.add_parser("speed", help="search throughput in nodes/sec")
+    speed.add_argument("--depth", type=int, default=5)
+
+    search = commands.add_parser("search", help="nodes searched by each search mode at equal depth")
+    search.add_argument("--depth", type=int, default=6)
+
+    parallel = commands.add_parser("parallel", help="root-splitting speedup versus worker count")
+    parallel.add_argument("--depth", type=int, default=5)
+    parallel.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+
+    endgame = commands.add_parser("endgame", help="exact endgame solver score, nodes and time")
+    endgame.add_argument("--max-empties", type=int, default=14)
+    endgame.add_argument("--wld", action="store_true", help="win/loss/draw only instead of exact disc difference")
+
+    batch = commands.add_parser("batch-eval", help="NumPy batch evaluator throughput and agreement (needs numpy)")
+    batch.add_argument("--positions", type=int, default=100000)
+
+    imports = commands.add_parser("imports", help="import time of the engine modules and worker start-up")
+    imports.add_argument("--repeats", type=int, default=5, help="fresh interpreters per module; the fastest counts")
+
+    suite = commands.add_parser("suite", help="perft, midgame and endgame throughput with optional baseline check")
+    suite.add_argument("--perft-depth", type=int, default=7)
+    suite.add_argument("--depth", type=int, default=5, help="midgame search depth")
+    suite.add_argument("--max-empties", type=int, default=12, help="largest endgame position solved")
+    suite.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    suite.add_argument("--baseline", metavar="PATH", help="JSON from an earlier run to compare against")
+    suite.add_argument("--max-regression", type=float, default=10.0,
+                       help="fail if nodes/sec drops by more than this many percent")
+
+    args = parser.parse_args()
+    if args.command == "suite":
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        results = run_suite(args.perft_depth, args.depth, args.max_empties)
+        suite_report(results, baseline)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+        failures = check_suite(results, baseline, args.max_regression)
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        if failures:
+            sys.exit(1)
+    elif args.command == "ordering":
+        ordering_report(args.depth)
+    elif args.command == "speed":
+        speed_report(args.depth)
+    elif args.command == "search":
+        search_mode_report(args.depth)
+    elif args.command == "parallel":
+        parallel_report(args.depth, args.workers)
+    elif args.command == "batch-eval":
+        batch_eval_report(args.positions)
+    elif args.command == "endgame":
+        endgame_report(args.max_empties, not args.wld)
+    elif args.command == "imports":
+        if not imports_report(args.repeats):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
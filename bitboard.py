@@ -0,0 +1,258 @@
+# Bitboard position representation.
+# Square index is row * 8 + col, so bit 0 is the top-left square (row 0, col 0)
+# and iterating set bits from low to high visits squares in row-major order.
+
+FULL = 0xFFFFFFFFFFFFFFFF
+NOT_A_FILE = 0xFEFEFEFEFEFEFEFE  # every square except column 0
+NOT_H_FILE = 0x7F7F7F7F7F7F7F7F  # every square except column 7
+
+# (shift, destination mask) per direction. The mask drops bits that would wrap
+# around to the other side of the board after the shift.
+LEFT_SHIFTS = [
+    (1, NOT_A_FILE),   # east
+    (8, FULL),         # south
+    (9, NOT_A_FILE),   # south-east
+    (7, NOT_H_FILE),   # south-west
+]
+RIGHT_SHIFTS = [
+    (1, NOT_H_FILE),   # west
+    (8, FULL),         # north
+    (9, NOT_H_FILE),   # north-west
+    (7, NOT_A_FILE),   # north-east
+]
+
+INITIAL_BLACK = (1 << 28) | (1 << 35)  # (3, 4) and (4, 3)
+INITIAL_WHITE = (1 << 27) | (1 << 36)  # (3, 3) and (4, 4)
+
+
+def square_bit(row, col):
+    return 1 << (row * 8 + col)
+
+
+def iter_squares(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def legal_moves(own, opp):
+    empty = ~(own | opp) & FULL
+    moves = 0
+
+    for shift, mask in LEFT_SHIFTS:
+        o = opp & mask
+        x = (own << shift) & o
+        x |= (x << shift) & o
+        x |= (x << shift) & o
+        x |= (x << shift) & o
+        x |= (x << shift) & o
+        x |= (x << shift) & o
+        moves |= (x << shift) & mask & empty
+
+    for shift, mask in RIGHT_SHIFTS:
+        o = opp & mask
+        x = (own >> shift) & o
+        x |= (x >> shift) & o
+        x |= (x >> shift) & o
+        x |= (x >> shift) & o
+        x |= (x >> shift) & o
+        x |= (x >> shift) & o
+        moves |= (x >> shift) & mask & empty
+
+    return moves
+
+
+def flip_mask(own, opp, sq):
+    flips = 0
+    bit = 1 << sq
+
+    for shift, mask in LEFT_SHIFTS:
+        line = 0
+        x = (bit << shift) & mask
+        while x & opp:
+            line |= x
+            x = (x << shift) & mask
+        if x & own:
+            flips |= line
+
+    for shift, mask in RIGHT_SHIFTS:
+        line = 0
+        x = (bit >> shift) & mask
+        while x & opp:
+            line |= x
+            x = (x >> shift) & mask
+        if x & own:
+            flips |= line
+
+    return flips
+
+
+class Position:
+    __slots__ = ("black", "white")
+
+    def __init__(self, black=0, white=0):
+        self.black = black
+        self.white = white
+
+    @classmethod
+    def initial(cls):
+        return cls(INITIAL_BLACK, INITIAL_WHITE)
+
+    @classmethod
+    def from_board(cls, board):
+        black = white = 0
+        bit = 1
+        for row in board:
+            for cell in row:
+                if cell == "black":
+                    black |= bit
+                elif cell == "white":
+                    white |= bit
+                bit <<= 1
+        return cls(black, white)
+
+    def to_board(self):
+        board = [[None for _ in range(8)] for _ in range(8)]
+        for sq in iter_squares(self.black):
+            board[sq >> 3][sq & 7] = "black"
+        for sq in iter_squares(self.white):
+            board[sq >> 3][sq & 7] = "white"
+        return board
+
+    def copy(self):
+        return Position(self.black, self.white)
+
+    def bits(self, player):
+        # (own, opponent) from the given player's point of view
+        if player == "black":
+            return self.black, self.white
+        return self.white, self.black
+
+    def move_mask(self, player):
+        own, opp = self.bits(player)
+        return legal_moves(own, opp)
+
+    def get_valid_moves(self, player):
+        return [divmod(sq, 8) for sq in iter_squares(self.move_mask(player))]
+
+    def play(self, sq, player):
+        own, opp = self.bits(player)
+        flips = flip_mask(own, opp, sq)
+        own |= flips | (1 << sq)
+        opp &= ~flips
+        if player == "black":
+            self.black, self.white = own, opp
+        else:
+            self.white, self.black = own, opp
+        return flips
+
+    def undo(self, sq, player, flips):
+        # Exact inverse of play(sq, player) given the flips it returned
+        own, opp = self.bits(player)
+        own ^= flips | (1 << sq)
+        opp |= flips
+        if player == "black":
+            self.black, self.white = own, opp
+        else:
+            self.white, self.black = own, opp
+
+    def make_move(self, row, col, player):
+        return self.play(row * 8 + col, player)
+
+    def undo_move(self, row, col, player, flips):
+        self.undo(row * 8 + col, player, flips)
+
+    def get_score(self):
+        return self.black.bit_count(), self.white.bit_count()
+
+    def num_discs(self):
+        return (self.black | self.white).bit_count()
+
+    def __eq__(self, other):
+        return isinstance(other, Position) and self.black == other.black and self.white == other.white
+
+
+def as_position(board):
+    # Accept either a bitboard Position or the 8x8 list board used by the UI
+    if isinstance(board, Position):
+        return board
+    return Position.from_board(board)
+
+
+# --- Move notation ---
+# Standard Othello coordinates: column letter a-h, row number 1-8 from the top,
+# so the opening move f5 is (row 4, col 5).
+
+def square_name(sq):
+    return "abcdefgh"[sq & 7] + str((sq >> 3) + 1)
+
+
+def parse_square(name):
+    col = "abcdefgh".find(name[0].lower())
+    row = int(name[1]) - 1 if name[1:].isdigit() else -1
+    if col < 0 or not 0 <= row < 8 or len(name) != 2:
+        raise ValueError(f"bad square name: {name!r}")
+    return row * 8 + col
+
+
+def get_opponent(player):
+    return "white" if player == "black" else "black"
+
+
+# Board strings: 64 squares row by row from a1, X or * black, O or o white,
+# - or . empty; the side to move is X / * or O / o
+BOARD_CHARS = {"X": "black", "*": "black", "O": "white", "o": "white", "-": None, ".": None}
+
+
+def parse_board(squares, side):
+    # -> (position, to_move); a side to move that must pass is switched
+    if len(squares) != 64 or any(c not in BOARD_CHARS for c in squares):
+        raise ValueError("expected 64 squares of X, O or -")
+    if side not in ("X", "*", "O", "o"):
+        raise ValueError(f"bad side to move: {side!r}")
+    position = Position()
+    for sq, c in enumerate(squares):
+        if BOARD_CHARS[c] == "black":
+            position.black |= 1 << sq
+        elif BOARD_CHARS[c] == "white":
+            position.white |= 1 << sq
+    to_move = BOARD_CHARS[side]
+    if not position.move_mask(to_move) and position.move_mask(get_opponent(to_move)):
+        to_move = get_opponent(to_move)
+    return position, to_move
+
+
+def transcript_squares(transcript):
+    # "f5d6c3" -> [37, 43, 18]
+    return [parse_square(transcript[i:i + 2]) for i in range(0, len(transcript), 2)]
+
+
+def replay_moves(moves, check=True):
+    # Plays a game from the initial position, given as squares. Yields
+    # (position, to_move, sq) before each move, then (position, to_move, None)
+    # once after the last one, to_move then being the side to move next.
+    # Passes are implicit: a side without a legal move is skipped. The
+    # position is live, so copy it to keep it. check=False trusts the moves
+    # (e.g. from a game record) and skips the legality test.
+    position = Position.initial()
+    to_move = "black"
+    for sq in moves:
+        if not position.move_mask(to_move):
+            to_move = get_opponent(to_move)
+        if check and not position.move_mask(to_move) >> sq & 1:
+            raise ValueError(f"illegal move {square_name(sq)} for {to_move}")
+        yield position, to_move, sq
+        position.play(sq, to_move)
+        to_move = get_opponent(to_move)
+    if not position.move_mask(to_move) and position.move_mask(get_opponent(to_move)):
+        to_move = get_opponent(to_move)
+    yield position, to_move, None
+
+
+def position_from_transcript(transcript):
+    # Replay a move list such as "f5d6c3" from the initial position. Passes are
+    # implicit; returns the position and the side to move next.
+    for position, to_move, _ in replay_moves(transcript_squares(transcript)):
+        pass
+    return position, to_move
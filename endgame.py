@@ -0,0 +1,160 @@
+import time
+from bitboard import FULL, flip_mask, legal_moves, iter_squares
+
+# Exact endgame solver. Scores are final disc differences (own - opponent) for
+# the side to move, the same count get_score uses to decide the winner.
+
+ENDGAME_EMPTIES = 14          # switch from the heuristic search at this many empties
+FASTEST_FIRST_EMPTIES = 6     # above this, order by opponent mobility; below, parity only
+SMALL_EMPTIES = 4             # last few empties: scan empty squares, no move generation
+CHECK_INTERVAL = 4096         # nodes between clock / stop checks
+
+# 4x4 board quadrants used for parity ordering
+QUADRANTS = [0x000000000F0F0F0F, 0x00000000F0F0F0F0, 0x0F0F0F0F00000000, 0xF0F0F0F000000000]
+
+
+class EndgameTimeout(Exception):
+    pass
+
+
+def parity_mask(empty):
+    # Squares in quadrants holding an odd number of empties; playing there
+    # first tends to leave the opponent the worse regions.
+    odd = 0
+    for quadrant in QUADRANTS:
+        if (empty & quadrant).bit_count() & 1:
+            odd |= quadrant
+    return odd
+
+
+class EndgameSolver:
+    def __init__(self, deadline=None, should_stop=None):
+        self.deadline = deadline
+        self.should_stop = should_stop
+        self.nodes = 0
+
+    def _check_clock(self):
+        if self.deadline is not None and time.time() > self.deadline:
+            raise EndgameTimeout()
+        if self.should_stop is not None and self.should_stop():
+            raise EndgameTimeout()
+
+    def solve(self, own, opp, alpha=-64, beta=64):
+        # Returns (score, best_square) for the side owning `own`
+        moves = legal_moves(own, opp)
+        if not moves:
+            return -self._search(opp, own, -beta, -alpha, True), None
+
+        best_score, best_square = -65, None
+        for sq, flips in self._order(own, opp, moves, ~(own | opp) & FULL):
+            score = -self._search(opp & ~flips, own | flips | (1 << sq), -beta, -alpha)
+            if score > best_score:
+                best_score, best_square = score, sq
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score, best_square
+
+    def _order(self, own, opp, moves, empty):
+        odd = parity_mask(empty)
+        scored = []
+        for sq in iter_squares(moves):
+            flips = flip_mask(own, opp, sq)
+            # Fastest first: fewest replies for the opponent, odd regions first
+            mobility = legal_moves(opp & ~flips, own | flips | (1 << sq)).bit_count()
+            scored.append((mobility, not odd >> sq & 1, sq, flips))
+        scored.sort()
+        return [(sq, flips) for _, _, sq, flips in scored]
+
+    def _search(self, own, opp, alpha, beta, passed=False):
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self._check_clock()
+
+        empty = ~(own | opp) & FULL
+        n_empty = empty.bit_count()
+        if n_empty <= SMALL_EMPTIES:
+            return self._search_small(own, opp, alpha, beta, empty, n_empty)
+
+        moves = legal_moves(own, opp)
+        if not moves:
+            if passed:
+                return own.bit_count() - opp.bit_count()
+            return -self._search(opp, own, -beta, -alpha, True)
+
+        if n_empty > FASTEST_FIRST_EMPTIES:
+            ordered = self._order(own, opp, moves, empty)
+        else:
+            odd = parity_mask(empty)
+            ordered = [(sq, flip_mask(own, opp, sq))
+                       for part in (moves & odd, moves & ~odd) for sq in iter_squares(part)]
+
+        best = -65
+        for sq, flips in ordered:
+            score = -self._search(opp & ~flips, own | flips | (1 << sq), -beta, -alpha)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+    def _search_small(self, own, opp, alpha, beta, empty, n_empty, passed=False):
+        # Last 1-4 empties: try each empty square directly, parity order
+        if n_empty == 1:
+            return self._last_move(own, opp, empty)
+        self.nodes += 1
+
+        odd = parity_mask(empty)
+        best = -65
+        for part in (empty & odd, empty & ~odd):
+            for sq in iter_squares(part):
+                flips = flip_mask(own, opp, sq)
+                if not flips:
+                    continue
+                bit = 1 << sq
+                score = -self._search_small(opp & ~flips, own | flips | bit, -beta, -alpha, empty ^ bit, n_empty - 1)
+                if score > best:
+                    best = score
+                    if score > alpha:
+                        alpha = score
+                        if alpha >= beta:
+                            return best
+
+        if best == -65:
+            # No legal move for the side to move
+            if passed:
+                return own.bit_count() - opp.bit_count()
+            return -self._search_small(opp, own, -beta, -alpha, empty, n_empty, True)
+        return best
+
+    def _last_move(self, own, opp, empty):
+        self.nodes += 1
+        sq = empty.bit_length() - 1
+        n_own, n_opp = own.bit_count(), opp.bit_count()
+        flips = flip_mask(own, opp, sq).bit_count()
+        if flips:
+            return n_own + flips + 1 - (n_opp - flips)
+        # Side to move passes; the opponent may still take the last square
+        flips = flip_mask(opp, own, sq).bit_count()
+        if flips:
+            return n_own - flips - (n_opp + flips + 1)
+        return n_own - n_opp
+
+
+def solve_endgame(position, color, exact=True, deadline=None, should_stop=None):
+    # Exact disc difference (or just win/loss/draw with exact=False) for `color`
+    # to move. Returns (score, move, nodes), or None if the deadline passed.
+    solver = EndgameSolver(deadline, should_stop)
+    own, opp = position.bits(color)
+    window = (-64, 64) if exact else (-1, 1)
+    try:
+        score, sq = solver.solve(own, opp, *window)
+    except EndgameTimeout:
+        return None
+    if not exact:
+        score = (score > 0) - (score < 0)
+    move = divmod(sq, 8) if sq is not None else None
+    return score, move, solver.nodes
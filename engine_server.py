@@ -0,0 +1,489 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import Position, get_opponent, parse_board, parse_square, position_from_transcript, square_name
+from minimax_ai import MAX_DEPTH, SEARCH_MODES, SearchContext, iterative_deepening, run_sync, session_table
+
+# Headless engine service for many games at once (bots, tournament backends).
+# Clients speak a line protocol over TCP, or over stdin/stdout with --stdio:
+#
+#   session <id> [budget <seconds>] [search alphabeta|pvs]   create or reset a game
+#   position <id> startpos [moves <f5d6...>]
+#   position <id> board <64 squares of X/O/-> <X|O>   (also */o/., as bitboard.parse_board reads)
+#   go <id> [depth <n>] [time <seconds>]   -> bestmove <id> <move|pass|none> score ... endgame 0|1 ... latency_ms ...
+#   ponder <id> [move <square>]            search (the position after <square>) until stop or preempted
+#                                          -> ponderdone <id> <move|none> score ... endgame 0|1 depth ... nodes ...
+#   stop <id>                              finish the running search now, drop queued ones
+#   stats                                  -> stats {json}
+#   ping                                   -> pong
+#   quit
+#
+# score is from the mover's side: with endgame 1 it is the exact final disc
+# difference and depth is the empties solved, with endgame 0 it is the
+# heuristic evaluation. It is "none" when the search stopped before finishing
+# its first iteration.
+#
+# Searches run on a bounded process pool with one slot per worker. Waiting
+# requests are served round-robin across sessions, one search per session at a
+# time; ponders only use slots no go request is waiting for and are stopped
+# when one is. When too many requests are queued, the server stops reading
+# from clients until the queue drains, so TCP pushes back on them.
+
+DEFAULT_MOVE_TIME = 5.0   # seconds for a go without depth or time
+MAX_PENDING = 256         # queued go requests over all sessions before reading pauses
+MAX_SESSION_QUEUE = 4     # queued go requests per session before they are refused
+LATENCY_SAMPLES = 1000    # recent requests kept for the latency percentiles
+
+_stop_flags = None
+
+
+# --- Worker process ---
+
+def _init_server_worker(stop_flags):
+    global _stop_flags
+    _stop_flags = stop_flags
+
+
+def _server_search(slot, black, white, to_move, depth, time_limit, search, session_key):
+    # A session served by another worker than last time starts a fresh table
+    ctx = SearchContext(get_opponent(to_move), to_move, time.time(), time_limit, session_table(session_key))
+    ctx.cooperative = False
+    ctx.search = search
+    ctx.should_stop = lambda: _stop_flags[slot]
+    score, move, stats = run_sync(iterative_deepening(ctx, Position(black, white), depth))
+    return score, move, stats.depth, stats.endgame, stats.nodes, stats.elapsed
+
+
+# --- Server state ---
+
+class Request:
+    def __init__(self, session, kind, position, to_move, depth, time_limit):
+        self.session = session
+        self.kind = kind  # "go" or "ponder"
+        self.position = position
+        self.to_move = to_move
+        self.depth = depth
+        self.time_limit = time_limit
+        self.enqueued = time.time()
+        self.started = None
+        self.slot = None
+
+
+class Session:
+    def __init__(self, connection, name, budget=math.inf, search="alphabeta"):
+        self.connection = connection
+        self.name = name
+        self.key = f"{id(connection)}:{name}"
+        self.budget = budget  # seconds of search left for go requests
+        self.search = search
+        self.position, self.to_move = Position.initial(), "black"
+        self.queue = deque()  # waiting go requests
+        self.ponder = None    # waiting ponder request
+        self.active = None    # request being searched
+        self.ready = {"go": False, "ponder": False}  # in the connection's ready queue of that kind
+        self.closed = False
+
+
+class Connection:
+    def __init__(self, write):
+        self.write = write
+        self.sessions = {}
+        # This connection's sessions with a queued request of each kind
+        self.ready = {"go": deque(), "ponder": deque()}
+        self.listed = {"go": False, "ponder": False}  # in the server's ready queue of that kind
+
+    def send(self, line):
+        self.write(line + "\n")
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class EngineServer:
+    def __init__(self, workers=None, max_pending=MAX_PENDING, max_session_queue=MAX_SESSION_QUEUE):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.max_session_queue = max_session_queue
+        mp_context = multiprocessing.get_context("spawn")
+        self._stop_flags = mp_context.Array("b", self.workers, lock=False)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context,
+                                             initializer=_init_server_worker, initargs=(self._stop_flags,))
+        self._free_slots = list(range(self.workers))
+        self._running = {}  # slot -> request
+        # Connections with a queued go request / ponder, in round-robin order
+        self._ready = {"go": deque(), "ponder": deque()}
+        self.pending = 0
+        self._room = asyncio.Event()
+        self._room.set()
+        # Counters for the stats command
+        self.completed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # (queued ms, search ms, total ms)
+        self._closing = False
+
+    def close(self):
+        self._closing = True
+        for slot in self._running:
+            self._stop_flags[slot] = 1
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    # --- Commands ---
+
+    async def handle_line(self, connection, line):
+        # Runs one protocol command; returns False on quit
+        words = line.split()
+        if not words:
+            return True
+        command, args = words[0].lower(), words[1:]
+        try:
+            if command == "quit":
+                return False
+            elif command == "ping":
+                connection.send("pong")
+            elif command == "stats":
+                connection.send("stats " + json.dumps(self.stats()))
+            elif command == "session":
+                self.command_session(connection, args)
+            elif command in ("position", "go", "ponder", "stop"):
+                if not args or args[0] not in connection.sessions:
+                    raise ValueError(f"unknown session {args[0] if args else '(none)'}")
+                session = connection.sessions[args[0]]
+                getattr(self, "command_" + command)(session, args[1:])
+            else:
+                raise ValueError(f"unknown command {command!r}")
+        except (ValueError, IndexError) as exc:
+            connection.send(f"error {args[0] if args else '-'} {exc}")
+        # Backpressure: wait for room in the queue before the next command
+        await self._room.wait()
+        return True
+
+    def command_session(self, connection, args):
+        name, options = args[0], _options(args[1:])
+        old = connection.sessions.get(name)
+        if old is not None:
+            self.drop_session(old)
+        search = options.get("search", "alphabeta")
+        if search not in SEARCH_MODES:
+            raise ValueError(f"search must be one of {SEARCH_MODES}")
+        connection.sessions[name] = Session(connection, name, float(options.get("budget", math.inf)), search)
+
+    def command_position(self, session, args):
+        if args[0] == "startpos":
+            moves = _options(args[1:]).get("moves", "")
+            session.position, session.to_move = position_from_transcript(moves)
+        elif args[0] == "board":
+            session.position, session.to_move = parse_board(args[1], args[2])
+        else:
+            raise ValueError("position needs startpos or board")
+
+    def command_go(self, session, args):
+        options = _options(args)
+        if len(session.queue) >= self.max_session_queue:
+            self.rejected += 1
+            raise ValueError(f"busy: {len(session.queue)} searches already queued")
+        if session.budget <= 0:
+            raise ValueError("time budget used up")
+        position, to_move = session.position, session.to_move
+        if not position.move_mask(to_move):
+            # Nothing to search: the side to move passes, or the game is over
+            result = "pass" if position.move_mask(get_opponent(to_move)) else "none"
+            session.connection.send(f"bestmove {session.name} {result}")
+            return
+        depth = int(options.get("depth", MAX_DEPTH))
+        time_limit = float(options.get("time", DEFAULT_MOVE_TIME if "depth" not in options else math.inf))
+        request = Request(session, "go", position.copy(), to_move, depth, time_limit)
+        session.queue.append(request)
+        self.pending += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.pending)
+        if self.pending >= self.max_pending:
+            self._room.clear()
+        self._mark_ready(session, "go")
+        if session.active is not None and session.active.kind == "ponder":
+            self._stop_flags[session.active.slot] = 1  # the move search has priority
+        self.schedule()
+
+    def command_ponder(self, session, args):
+        options = _options(args)
+        position, to_move = session.position.copy(), session.to_move
+        if "move" in options:
+            sq = parse_square(options["move"])
+            if not position.move_mask(to_move) >> sq & 1:
+                raise ValueError(f"illegal move {options['move']}")
+            position.play(sq, to_move)
+            to_move = get_opponent(to_move)
+            if not position.move_mask(to_move):
+                to_move = get_opponent(to_move)
+        if not position.move_mask(to_move):
+            raise ValueError("nothing to ponder: the game is over")
+        session.ponder = Request(session, "ponder", position, to_move, MAX_DEPTH, math.inf)
+        self._mark_ready(session, "ponder")
+        self.schedule()
+
+    def command_stop(self, session, args):
+        # The running search answers with its best move so far; queued
+        # searches are dropped
+        self._drop_queued(session)
+        if session.active is not None:
+            self._stop_flags[session.active.slot] = 1
+
+    def drop_session(self, session):
+        session.closed = True
+        self.command_stop(session, [])
+
+    def _drop_queued(self, session):
+        self.pending -= len(session.queue)
+        session.queue.clear()
+        session.ponder = None
+        if self.pending < self.max_pending:
+            self._room.set()
+
+    # --- Scheduling ---
+
+    def _mark_ready(self, session, kind):
+        connection = session.connection
+        if not session.ready[kind]:
+            session.ready[kind] = True
+            connection.ready[kind].append(session)
+        if not connection.listed[kind]:
+            connection.listed[kind] = True
+            self._ready[kind].append(connection)
+
+    def _next_request(self):
+        # Round-robin over connections, then over the sessions of each, so a
+        # client with many games does not crowd out the others. Go requests
+        # come before ponders; a session with a search running waits for its
+        # next turn.
+        for kind in ("go", "ponder"):
+            connections = self._ready[kind]
+            for _ in range(len(connections)):
+                connection = connections.popleft()
+                connection.listed[kind] = False
+                request = self._next_session_request(connection, kind)
+                if connection.ready[kind]:
+                    connection.listed[kind] = True
+                    connections.append(connection)
+                if request is not None:
+                    return request
+        return None
+
+    def _next_session_request(self, connection, kind):
+        sessions = connection.ready[kind]
+        for _ in range(len(sessions)):
+            session = sessions.popleft()
+            session.ready[kind] = False
+            if session.closed or (session.ponder is None if kind == "ponder" else not session.queue):
+                continue
+            if session.active is not None:
+                session.ready[kind] = True
+                sessions.append(session)
+                continue
+            if kind == "ponder":
+                request, session.ponder = session.ponder, None
+                return request
+            request = session.queue.popleft()
+            self.pending -= 1
+            if self.pending < self.max_pending:
+                self._room.set()
+            if session.queue:
+                session.ready[kind] = True
+                sessions.append(session)
+            return request
+        return None
+
+    def schedule(self):
+        while self._free_slots:
+            request = self._next_request()
+            if request is None:
+                break
+            if request.kind == "go":
+                # Earlier searches of the session may have used up its budget
+                session = request.session
+                if session.budget <= 0:
+                    session.connection.send(f"error {session.name} time budget used up")
+                    continue
+                request.time_limit = min(request.time_limit, session.budget)
+            request.slot = self._free_slots.pop()
+            request.started = time.time()
+            request.session.active = request
+            self._running[request.slot] = request
+            self._stop_flags[request.slot] = 0
+            asyncio.get_running_loop().create_task(self._run(request))
+        if not self._free_slots and any(s.queue and s.active is None
+                                        for c in self._ready["go"] for s in c.ready["go"]):
+            # A move search is waiting: preempt the ponders
+            for slot, request in self._running.items():
+                if request.kind == "ponder":
+                    self._stop_flags[slot] = 1
+
+    async def _run(self, request):
+        session = request.session
+        loop = asyncio.get_running_loop()
+        try:
+            score, move, depth, endgame, nodes, elapsed = await loop.run_in_executor(
+                self._executor, _server_search, request.slot, request.position.black, request.position.white,
+                request.to_move, request.depth, request.time_limit, session.search, session.key)
+            if request.kind == "go":
+                session.budget -= elapsed  # before the session's next search is scheduled
+        except Exception as exc:
+            if not session.closed:
+                session.connection.send(f"error {session.name} search failed: {exc}")
+            return
+        finally:
+            del self._running[request.slot]
+            self._free_slots.append(request.slot)
+            session.active = None
+            if not self._closing:
+                self.schedule()
+
+        finished = time.time()
+        move_name = square_name(move[0] * 8 + move[1]) if move else "none"
+        result = f"{move_name} score {'none' if score is None else score} endgame {int(endgame)} depth {depth}"
+        if request.kind == "ponder":
+            if not session.closed:
+                session.connection.send(f"ponderdone {session.name} {result} nodes {nodes}")
+            return
+        queued_ms = (request.started - request.enqueued) * 1000
+        search_ms = (finished - request.started) * 1000
+        latency_ms = (finished - request.enqueued) * 1000
+        self.completed += 1
+        self.latencies.append((queued_ms, search_ms, latency_ms))
+        if not session.closed:
+            budget = f" budget {session.budget:.2f}" if session.budget != math.inf else ""
+            session.connection.send(
+                f"bestmove {session.name} {result} nodes {nodes} "
+                f"queued_ms {queued_ms:.0f} search_ms {search_ms:.0f} latency_ms {latency_ms:.0f} "
+                f"queue {self.pending}{budget}")
+
+    def stats(self):
+        queued = [q for q, _, _ in self.latencies]
+        totals = [t for _, _, t in self.latencies]
+        return dict(
+            workers=self.workers,
+            running=len(self._running),
+            running_ponders=sum(r.kind == "ponder" for r in self._running.values()),
+            queue_depth=self.pending,
+            max_queue_depth=self.max_queue_depth,
+            completed=self.completed,
+            rejected=self.rejected,
+            queued_ms_p50=round(_percentile(queued, 0.5)),
+            queued_ms_p95=round(_percentile(queued, 0.95)),
+            latency_ms_p50=round(_percentile(totals, 0.5)),
+            latency_ms_p95=round(_percentile(totals, 0.95)),
+            latency_ms_max=round(max(totals, default=0)),
+        )
+
+    # --- Transports ---
+
+    async def serve_connection(self, reader, connection):
+        # Returns True when the input ended, False on quit
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return True
+                if not await self.handle_line(connection, line.decode(errors="replace")):
+                    return False
+        except ConnectionError:
+            return False
+
+    async def finish(self, connection):
+        # Lets the queued and running move searches of a connection answer
+        # and stops its ponders
+        for session in connection.sessions.values():
+            session.ponder = None
+            if session.active is not None and session.active.kind == "ponder":
+                self._stop_flags[session.active.slot] = 1
+        while any(s.queue or s.active is not None for s in connection.sessions.values()):
+            await asyncio.sleep(0.05)
+
+    async def serve_tcp(self, host, port):
+        async def client(reader, writer):
+            connection = Connection(lambda text: writer.write(text.encode()))
+            try:
+                await self.serve_connection(reader, connection)
+            finally:
+                # Nobody is left to read the answers
+                for session in connection.sessions.values():
+                    self.drop_session(session)
+                writer.close()
+
+        server = await asyncio.start_server(client, host, port)
+        print(f"engine server on {host}:{port} with {self.workers} workers", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_stdio(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        def write(text):
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+        connection = Connection(write)
+        if await self.serve_connection(reader, connection):
+            await self.finish(connection)  # end of input: answer what was asked
+        for session in connection.sessions.values():
+            self.drop_session(session)
+
+
+def _options(words):
+    # ["depth", "5", "time", "1"] -> {"depth": "5", "time": "1"}
+    if len(words) % 2:
+        raise ValueError(f"expected name value pairs, got {' '.join(words)!r}")
+    return dict(zip(words[::2], words[1::2]))
+
+
+async def _report(server, interval):
+    while True:
+        await asyncio.sleep(interval)
+        print("stats " + json.dumps(server.stats()), file=sys.stderr)
+
+
+async def run_server(args):
+    server = EngineServer(args.workers, args.max_pending, args.max_session_queue)
+    reporter = asyncio.create_task(_report(server, args.report_interval)) if args.report_interval else None
+    try:
+        if args.stdio:
+            await server.serve_stdio()
+        else:
+            await server.serve_tcp(args.host, args.port)
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Othello engine serving many games over a line protocol")
+    parser.add_argument("--stdio", action="store_true", help="speak the protocol on stdin/stdout instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7878)
+    parser.add_argument("--workers", type=int, default=None, help="search processes (default: one per CPU)")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING,
+                        help="queued searches before the server stops reading commands")
+    parser.add_argument("--max-session-queue", type=int, default=MAX_SESSION_QUEUE,
+                        help="queued searches per session before go is refused")
+    parser.add_argument("--report-interval", type=float, default=None, help="print stats to stderr every N seconds")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_server(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
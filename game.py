@@ -1,61 +1,226 @@
 import pygame
 import asyncio
-import copy
-import time
-from board import draw_board, get_valid_moves, make_move, get_score, display_board_in_console
-from minimax_ai import start_minimax_async
+import uuid
+from board import get_score, display_board_in_console
+from bitboard import as_position, get_opponent, square_name
+from game_record import GAMES_PATH, record_game
+from game_state import next_state
+from history import EngineCache, MoveLog
+from minimax_ai import start_minimax_async, start_minimax_in_executor
+from opening_book import OpeningBook
+from renderer import FRAME_CAP, Renderer
+from search_stats import append_search_log
+from time_control import GameClock, TimeControl, allocate
+from transposition import TranspositionTable, zobrist_hash
 
 BOARD_SIZE = 8
 CELL_SIZE = 80
 BOARD_OFFSET_Y = 40
 
-
-async def minimax_ai_move(board, ai_color, player_color):
+# Clock for each side: minutes plus seconds added per move. The AI shares its
+# budget out over the game; the human's clock is shown but never flags.
+TIME_CONTROL = TimeControl.parse("5+3")
+# "process" searches in a worker process so the UI keeps its frame rate;
+# "cooperative" searches on the event loop and yields to it periodically.
+AI_MODE = "process"
+# Path of a JSON-lines file that gets one record per AI search, or None
+SEARCH_LOG = None
+# Search statistics overlay on the board; toggled in game with the S key
+SHOW_SEARCH_STATS = False
+# Keep searching on the human's time, assuming they play the expected reply
+PONDER = True
+# Game database every finished game is appended to, or None to not record
+RECORD_GAMES = GAMES_PATH
+
+
+_book = None
+_book_checked = False
+
+
+def lookup_book_move(board, ai_color):
+    # The book is opened once, on the first AI move; no book file means no hits
+    global _book, _book_checked
+    if not _book_checked:
+        _book = OpeningBook.open_default()
+        _book_checked = True
+    if _book is None:
+        return None
+    return _book.lookup(board, ai_color)
+
+
+async def minimax_ai_move(board, ai_color, player_color, budget, tt=None, session=None, on_progress=None,
+                          on_stats=None):
     await asyncio.sleep(0)  # yield to event loop for smooth updates
-    _, best_move = await start_minimax_async(board, player_color, ai_color)
+    # Obvious moves are played instantly and their time stays on the clock
+    book_move = lookup_book_move(board, ai_color)
+    if book_move is not None:
+        print("AI played a book move")
+        return book_move
+    moves = as_position(board).get_valid_moves(ai_color)
+    if len(moves) == 1:
+        print("AI played its only move")
+        return moves[0]
+
+    if AI_MODE == "process":
+        score, best_move, stats = await start_minimax_in_executor(board, player_color, ai_color, budget.maximum,
+                                                                  session=session, on_progress=on_progress,
+                                                                  budget=budget)
+    else:
+        score, best_move, stats = await start_minimax_async(board, player_color, ai_color, budget.maximum, tt=tt,
+                                                            budget=budget)
+    print(f"AI searched to depth {stats.depth}")
+
+    if SEARCH_LOG:
+        move_name = square_name(best_move[0] * 8 + best_move[1]) if best_move else None
+        append_search_log(SEARCH_LOG, stats, mode=AI_MODE, ai_color=ai_color,
+                          discs=as_position(board).num_discs(),
+                          score=score, move=move_name)
+    if on_stats is not None:
+        on_stats(stats)
     return best_move
 
 
-async def run_ai(board, ai_color, player_color):
-    return await minimax_ai_move(board, ai_color, player_color)
-
+async def run_ai(board, ai_color, player_color, budget, tt=None, session=None, on_progress=None, on_stats=None):
+    return await minimax_ai_move(board, ai_color, player_color, budget, tt, session, on_progress, on_stats)
 
-def next_turn_with_skip(board, current_player, player_color, ai_color):
-    next_player = ai_color if current_player == player_color else player_color
 
-    player_moves = get_valid_moves(board, player_color)
-    ai_moves = get_valid_moves(board, ai_color)
-
-    # Check for game over
-    if len(player_moves) == 0 and len(ai_moves) == 0:
-        return None  # means game over
+def next_turn_with_skip(board, current_player):
+    # GameState for the next turn; game_over is set when neither side can move
+    state = next_state(board, current_player)
 
     # If next player has no moves, skip their turn
-    if len(get_valid_moves(board, next_player)) == 0:
-        print(f"{next_player} has no moves. Skipping turn...")
-        next_player = current_player  # stay same player for another move
+    if state.passed:
+        print(f"{get_opponent(current_player)} has no moves. Skipping turn...")
 
-    return next_player
+    return state
 
 
 async def start_game(screen, player_color="black"):
-    board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
-    board[3][3] = "white"
-    board[3][4] = "black"
-    board[4][3] = "black"
-    board[4][4] = "white"
+    # The move log owns the live position; undo and redo replay its entries
+    history = MoveLog(first_player="black")  # always start black
+    board = history.position
 
     display_board_in_console(board)
 
-    current_player = "black"  # always start black
+    # Moves, score and game-over status are computed once per position, not per frame
+    state = history.state()
     ai_color = "white" if player_color == "black" else "black"
 
-    previous_states = []
-
+    # Pressed whenever the side to move changes, including after undo and redo
+    clock = GameClock(TIME_CONTROL)
+    clock.start(state.current_player)
+
+    def move_budget(position, num_moves):
+        return allocate(clock.remaining(ai_color), TIME_CONTROL.increment, 64 - position.num_discs(), num_moves)
+
+    async def end_game():
+        if RECORD_GAMES:
+            number = record_game(history.moves(), RECORD_GAMES)
+            print(f"Game {number} saved to {RECORD_GAMES}")
+        return await show_win_screen(screen, board)
+
+    # Search memory for this game only; a new game starts with an empty table.
+    # In process mode the worker keeps the table, keyed by the session id.
+    tt = TranspositionTable()
+    session = uuid.uuid4().hex
+    # Moves the AI already chose, by position hash; after an undo or redo the
+    # AI replays its answer instead of searching again
+    engine_cache = EngineCache()
+
+    # Latest completed search iteration, shown in the bottom bar, the
+    # statistics of the last finished search for the overlay and the human
+    # reply that search expects
+    ai_status = {"text": None, "stats": None, "reply": None}
+    show_stats = SHOW_SEARCH_STATS
+
+    def show_progress(depth, score, move):
+        ai_status["text"] = f"Depth {depth}: {square_name(move[0] * 8 + move[1])}" if move else f"Depth {depth}"
+
+    def record_stats(stats):
+        ai_status["stats"] = stats
+        ai_status["reply"] = divmod(stats.pv[1], 8) if len(stats.pv) > 1 else None
+
+    async def search(position, key, budget, on_progress):
+        found = []
+
+        def on_stats(stats):
+            found.append(stats)
+            record_stats(stats)
+
+        move = await run_ai(position, ai_color, player_color, budget, tt, session, on_progress, on_stats)
+        engine_cache.store(key, move, found[-1] if found else None)
+        return move
+
+    async def cached_move(move):
+        return move
+
+    def launch_ai():
+        ai_status["text"] = None
+        ai_status["reply"] = None
+        cached = engine_cache.get(state.key)
+        if cached is not None:
+            move, stats = cached
+            print("AI reuses its earlier move for this position")
+            if stats is not None:
+                record_stats(stats)
+            return asyncio.create_task(cached_move(move))
+        budget = move_budget(state.position, len(state.valid_moves))
+        return asyncio.create_task(search(state.position, state.key, budget, show_progress))
+
+    # --- Pondering ---
+    # While the human thinks, the AI searches the position after the reply it
+    # expects. If the human plays it, that search becomes the AI's move search;
+    # its budget counts from the start of the ponder, so a long ponder is
+    # played almost at once. Any other move or Undo cancels it.
+    ponder = {"task": None, "move": None}
+
+    def ponder_progress(depth, score, move):
+        if ponder["task"] is not None:
+            ai_status["text"] = f"Ponder {square_name(ponder['move'][0] * 8 + ponder['move'][1])}: {depth}"
+        else:
+            show_progress(depth, score, move)
+
+    def start_ponder():
+        reply = ai_status["reply"]
+        if not PONDER or reply is None or reply not in state.moves[player_color]:
+            return
+        position = state.position.copy()
+        position.make_move(reply[0], reply[1], player_color)
+        if not position.move_mask(ai_color):
+            return  # the AI would have to pass
+        key = zobrist_hash(position, ai_color)
+        if engine_cache.get(key) is not None:
+            return  # already answered
+        budget = move_budget(position, position.move_mask(ai_color).bit_count())
+        ponder["move"] = reply
+        ponder["task"] = asyncio.create_task(search(position, key, budget, ponder_progress))
+
+    async def stop_ponder():
+        task = ponder["task"]
+        ponder.update(task=None, move=None)
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            ai_status["text"] = None
+
+    renderer = Renderer(screen)
     running = True
 
     ai_task = None
-    ai_start_time = None
+
+    async def stop_ai():
+        nonlocal ai_task
+        await stop_ponder()
+        if ai_task is not None and not ai_task.done():
+            ai_task.cancel()
+            try:
+                await ai_task
+            except asyncio.CancelledError:
+                pass
+        ai_task = None
 
     # --- Button Positions ---
     back_rect = pygame.Rect(10, 5, 80, 30)
@@ -63,16 +228,11 @@ async def start_game(screen, player_color="black"):
 
     # If player chose white, AI moves first
     if player_color == "white":
-        ai_start_time = time.time()
-        ai_task = asyncio.create_task(
-            run_ai(copy.deepcopy(board), ai_color, player_color)
-        )
+        ai_task = launch_ai()
 
     while running:
-        screen.fill((0, 128, 0))
-
-        valid_moves = get_valid_moves(board, current_player)
-        time_remaining = 0
+        valid_moves = state.valid_moves
+        time_remaining = max(0, clock.remaining(ai_color))  # the AI's budget, shown by the timer
 
         # --- Event Handling ---
         for event in pygame.event.get():
@@ -80,6 +240,24 @@ async def start_game(screen, player_color="black"):
                 return "QUIT"
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 return "MENU"
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_s:
+                show_stats = not show_stats
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_e:
+                print(f"Moves: {history.transcript()}")
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_r and history.can_redo:
+                await stop_ai()
+                print("Redoing up until player's next move...")
+                # Replay undone moves until it's the player's turn again (or the log runs out)
+                history.redo()
+                state = history.state()
+                while state.current_player != player_color and history.can_redo:
+                    history.redo()
+                    state = history.state()
+                clock.start(state.current_player)
+                display_board_in_console(board)
+                if state.game_over:
+                    renderer.draw(state, time_remaining, None, back_rect, undo_rect)
+                    return await end_game()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 x, y = event.pos
 
@@ -88,115 +266,91 @@ async def start_game(screen, player_color="black"):
                     return "MENU"
 
                 # Undo button logic (same as before)
-                if undo_rect.collidepoint(x, y) and previous_states:
-                    # Cancel AI task if it exists
-                    if ai_task is not None and not ai_task.done():
-                        ai_task.cancel()
-                        try:
-                            await ai_task
-                        except asyncio.CancelledError:
-                            pass
-                        ai_task = None
-                        ai_start_time = None
-
-                    board, current_player = previous_states.pop()
+                if undo_rect.collidepoint(x, y) and history.can_undo:
+                    await stop_ai()
+
+                    history.undo()
+                    state = history.state()
 
                     print("Undoing up until player's last move...")
                     # Keep undoing until it's the player's turn (or history runs out)
-                    while current_player != player_color and previous_states:
-                        board, current_player = previous_states.pop()
+                    while state.current_player != player_color and history.can_undo:
+                        history.undo()
+                        state = history.state()
+                    clock.start(state.current_player)
                     display_board_in_console(board)
 
                     # If undo restores AI's turn, trigger it
-                    if current_player == ai_color:
-                        ai_start_time = time.time()
-                        ai_task = asyncio.create_task(
-                            run_ai(copy.deepcopy(board), ai_color, player_color)
-                        )
+                    if state.current_player == ai_color:
+                        ai_task = launch_ai()
                     continue
 
                 # Player move
-                if current_player == player_color and ai_task is None and BOARD_OFFSET_Y <= y <= 680:
+                if state.current_player == player_color and ai_task is None and BOARD_OFFSET_Y <= y <= 680:
                     row, col = (y - BOARD_OFFSET_Y) // CELL_SIZE, x // CELL_SIZE
                     if (row, col) in valid_moves:
-                        previous_states.append((copy.deepcopy(board), current_player))
-                        make_move(board, row, col, current_player)
-                        print(f"{current_player} plays at row {7 - row}, col {col}")
+                        history.play(row * 8 + col, player_color)
+                        print(f"{player_color} plays at row {7 - row}, col {col}")
                         display_board_in_console(board)
 
-                        next_player = next_turn_with_skip(board, current_player, player_color, ai_color)
-                        if next_player is None:
+                        state = next_turn_with_skip(board, player_color)
+                        clock.start(state.current_player)
+                        if state.game_over:
+                            await stop_ponder()
                             # --- Draw Board & UI ---
-                            draw_board(screen, board, valid_moves, current_player, time_remaining)
-                            draw_other_ui(screen, back_rect, undo_rect, board)
-                            return await show_win_screen(screen, board)
-
-                        current_player = next_player
-
-                        if current_player == ai_color:
-                            ai_start_time = time.time()
-                            ai_task = asyncio.create_task(run_ai(copy.deepcopy(board), ai_color, player_color))
+                            renderer.draw(state, time_remaining, None, back_rect, undo_rect)
+                            return await end_game()
+
+                        if state.current_player == ai_color and ponder["task"] is not None and ponder["move"] == (row, col):
+                            print("Ponder hit")
+                            ai_task = ponder["task"]
+                            ponder.update(task=None, move=None)
+                        else:
+                            await stop_ponder()
+                            if state.current_player == ai_color:
+                                ai_task = launch_ai()
 
         # --- Handle AI move ---
         if ai_task is not None:
-            elapsed = time.time() - ai_start_time
-            time_remaining = max(0, 30 - elapsed)
-
             if ai_task.done():
                 ai_move = ai_task.result()
                 if ai_move:
-                    previous_states.append((copy.deepcopy(board), ai_color))
-                    make_move(board, ai_move[0], ai_move[1], ai_color)
-                    print(f"{current_player} plays at row {7 - ai_move[0]}, col {ai_move[1]}")
+                    history.play(ai_move[0] * 8 + ai_move[1], ai_color)
+                    print(f"{ai_color} plays at row {7 - ai_move[0]}, col {ai_move[1]}")
                     display_board_in_console(board)
 
-                    next_player = next_turn_with_skip(board, current_player, player_color, ai_color)
-                    if next_player is None:
+                    state = next_turn_with_skip(board, ai_color)
+                    clock.start(state.current_player)
+                    if state.game_over:
                         # --- Draw Board & UI ---
-                        draw_board(screen, board, valid_moves, current_player, time_remaining)
-                        draw_other_ui(screen, back_rect, undo_rect, board)
-                        return await show_win_screen(screen, board)
+                        renderer.draw(state, time_remaining, None, back_rect, undo_rect)
+                        return await end_game()
 
-                    current_player = next_player
-
-                if current_player == ai_color:
-                    ai_start_time = time.time()
-                    ai_task = asyncio.create_task(run_ai(copy.deepcopy(board), ai_color, player_color))
+                if state.current_player == ai_color:
+                    ai_task = launch_ai()
                 else:
                     ai_task = None
+                    start_ponder()
 
         # --- Draw Board & UI ---
-        draw_board(screen, board, valid_moves, current_player, time_remaining)
-
-        draw_other_ui(screen, back_rect, undo_rect, board)
+        # Only the parts of the screen that changed are redrawn
+        dirty = renderer.draw(state, time_remaining, ai_status["text"], back_rect, undo_rect, show_stats,
+                              ai_status["stats"])
 
-        if check_win_condition(player_color, ai_color, board):
-            return await show_win_screen(screen, board)
+        if state.game_over:
+            return await end_game()
 
         # --- If AI's turn and no task is running, start AI automatically ---
-        if ai_task is None and current_player == ai_color:
+        if ai_task is None and state.current_player == ai_color:
             print("AI turn resumed after skip or undo. Starting AI task...")
-            ai_start_time = time.time()
-            ai_task = asyncio.create_task(run_ai(copy.deepcopy(board), ai_color, player_color))
+            ai_task = launch_ai()
 
-        pygame.display.flip()
-        await asyncio.sleep(0)
+        renderer.present(dirty)
+        await renderer.next_frame()  # frame cap; the rest of the frame is free for the AI
 
     pygame.quit()
 
 
-def check_win_condition(player_color, ai_color, board):
-    # Recalculate moves for both players based on the current board
-    player_moves = get_valid_moves(board, player_color)
-    ai_moves = get_valid_moves(board, ai_color)
-
-    # If no valid moves for either player → game over
-    if len(player_moves) == 0 and len(ai_moves) == 0:
-        return True
-
-    return False
-
-
 async def show_win_screen(screen, board):
     black_score, white_score = get_score(board)
 
@@ -234,60 +388,5 @@ async def show_win_screen(screen, board):
                 return "QUIT"
             elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN):
                 return "MENU"
-        await asyncio.sleep(0)
-
-
-def draw_other_ui(screen, back_rect, undo_rect, board):
-    font = pygame.font.Font(None, 30)
-
-    # Get mouse position
-    mx, my = pygame.mouse.get_pos()
-
-    # --- Draw Buttons ---
-    # --- Draw Back button ---
-    back_color = (225, 225, 225)
-    back_hover_color = (200, 200, 200)
-    color = back_hover_color if back_rect.collidepoint(mx, my) else back_color
-    pygame.draw.rect(screen, color, back_rect, border_radius=5)
-    back_text = font.render("Back", True, (0, 0, 0))
-    back_text_rect = back_text.get_rect(center=back_rect.center)
-    screen.blit(back_text, back_text_rect)
-
-    # --- Draw Undo button ---
-    undo_color = (0, 100, 0)
-    undo_hover_color = (0, 140, 0)
-    color = undo_hover_color if undo_rect.collidepoint(mx, my) else undo_color
-    pygame.draw.rect(screen, color, undo_rect, border_radius=5)
-    undo_text = font.render("Undo", True, (255, 255, 255))
-    undo_text_rect = undo_text.get_rect(center=undo_rect.center)
-    screen.blit(undo_text, undo_text_rect)
-
-    # --- Draw Score Box in Top-Right ---
-    score_box_width, score_box_height = 120, 30
-    score_box_rect = pygame.Rect(screen.get_width() - score_box_width - 10, 5, score_box_width, score_box_height)
-    pygame.draw.rect(screen, (180, 180, 180), score_box_rect, border_radius=5)
-
-    # Get current scores
-    black_score, white_score = get_score(board)
-
-    # Split the box into two halves
-    half_width = score_box_width // 2
-
-    # Draw vertical separator line
-    separator_x = score_box_rect.x + half_width
-    pygame.draw.line(screen, (0, 0, 0), (separator_x, score_box_rect.y + 5),
-                     (separator_x, score_box_rect.y + score_box_height - 5), 2)
-
-    # Render scores
-    black_text = font.render(str(black_score), True, (0, 0, 0))
-    white_text = font.render(str(white_score), True, (255, 255, 255))
-
-    # Center each score in its own half
-    black_text_rect = black_text.get_rect(center=(score_box_rect.x + half_width // 2,
-                                                  score_box_rect.y + score_box_height // 2))
-    white_text_rect = white_text.get_rect(center=(score_box_rect.x + half_width + half_width // 2,
-                                                  score_box_rect.y + score_box_height // 2))
+        await asyncio.sleep(1 / FRAME_CAP)
 
-    # Blit scores
-    screen.blit(black_text, black_text_rect)
-    screen.blit(white_text, white_text_rect)
@@ -0,0 +1,219 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+from bitboard import replay_moves, square_name, transcript_squares
+
+# Game records and an append-only game database.
+#
+# A game is its move sequence, one byte per move holding the square
+# (row * 8 + col). Passes are not stored: a side passes exactly when it has no
+# legal move, so replaying the squares recovers them, as in "f5d6..."
+# transcripts.
+#
+# The database is two files:
+#   games.db   MAGIC, then one record per game: move count (u8), moves (u8 each)
+#   games.idx  INDEX_MAGIC, then the offset (u64) of each game's record in games.db
+# Both are only ever appended to and are read through mmap, so game N is one
+# index lookup and iterating over all games never loads the files. A game's
+# index entry is written after its record, so a crash can leave an unindexed
+# tail in games.db but never an index entry without its game; rebuild_index()
+# recreates the index from games.db alone.
+
+GAMES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "games.db")
+MAGIC = b"OTHGAME1"
+INDEX_MAGIC = b"OTHIDX01"
+OFFSET = struct.Struct("<Q")
+
+
+# --- Move sequences ---
+
+def encode_moves(squares):
+    return bytes(squares)
+
+
+def to_transcript(moves):
+    return "".join(square_name(sq) for sq in moves)
+
+
+def from_transcript(transcript):
+    # "f5d6c3" -> moves, checked for legality
+    moves = encode_moves(transcript_squares(transcript))
+    final_position(moves)
+    return moves
+
+
+def final_position(moves):
+    for position, _, _ in replay_moves(moves):
+        pass
+    return position
+
+
+# --- Database ---
+
+class GameDatabase:
+    def __init__(self, path=GAMES_PATH):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".idx"
+        for file_path, magic in ((self.path, MAGIC), (self.index_path, INDEX_MAGIC)):
+            if not os.path.exists(file_path):
+                with open(file_path, "wb") as f:
+                    f.write(magic)
+        self._data = open(self.path, "r+b")
+        self._index = open(self.index_path, "r+b")
+        self._data_map = self._index_map = None
+        for f, magic in ((self._data, MAGIC), (self._index, INDEX_MAGIC)):
+            if f.read(len(magic)) != magic:
+                self.close()
+                raise ValueError(f"{f.name} is not a game database file")
+        self._remap()
+
+    def _remap(self):
+        # Maps the files at their current size; called after appending
+        for m in (self._data_map, self._index_map):
+            if m is not None:
+                m.close()
+        self._data_map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index_map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = (len(self._index_map) - len(INDEX_MAGIC)) // OFFSET.size
+
+    def close(self):
+        for m in (self._data_map, self._index_map):
+            if m is not None:
+                m.close()
+        self._data.close()
+        self._index.close()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, n):
+        # Moves of game n (negative n counts from the end)
+        if n < 0:
+            n += self.count
+        if not 0 <= n < self.count:
+            raise IndexError(f"game {n} out of range ({self.count} games)")
+        offset = OFFSET.unpack_from(self._index_map, len(INDEX_MAGIC) + n * OFFSET.size)[0]
+        return self._data_map[offset + 1:offset + 1 + self._data_map[offset]]
+
+    def __iter__(self):
+        # Sequential scan of the data file, no index lookups
+        data, end = self._data_map, self._end()
+        offset = len(MAGIC)
+        while offset < end:
+            length = data[offset]
+            yield data[offset + 1:offset + 1 + length]
+            offset += 1 + length
+
+    def _end(self):
+        # End of the last indexed record; anything after it is an unfinished append
+        if not self.count:
+            return len(MAGIC)
+        offset = OFFSET.unpack_from(self._index_map, len(self._index_map) - OFFSET.size)[0]
+        return offset + 1 + self._data_map[offset]
+
+    def append(self, moves):
+        return self.extend([moves])[0]
+
+    def extend(self, games):
+        # Appends many games with one remap; returns their numbers
+        self._data.seek(self._end())
+        self._data.truncate()  # drop an unindexed tail left by a crash
+        offsets = []
+        for moves in games:
+            moves = encode_moves(moves)
+            if len(moves) > 60:
+                raise ValueError(f"{len(moves)} moves; a game has at most 60")
+            offsets.append(self._data.tell())
+            self._data.write(bytes([len(moves)]) + moves)
+        self._data.flush()
+        self._index.seek(0, os.SEEK_END)
+        self._index.write(b"".join(OFFSET.pack(offset) for offset in offsets))
+        self._index.flush()
+        first = self.count
+        self._remap()
+        return list(range(first, first + len(offsets)))
+
+    def rebuild_index(self):
+        # Recreates games.idx by scanning games.db
+        offsets = []
+        offset, data = len(MAGIC), self._data_map
+        while offset < len(data) and offset + 1 + data[offset] <= len(data):
+            offsets.append(offset)
+            offset += 1 + data[offset]
+        self._index.seek(0)
+        self._index.truncate()
+        self._index.write(INDEX_MAGIC + b"".join(OFFSET.pack(o) for o in offsets))
+        self._index.flush()
+        self._remap()
+
+
+def record_game(moves, path=GAMES_PATH):
+    # Appends one finished game; returns its number
+    db = GameDatabase(path)
+    try:
+        return db.append(moves)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import, export and inspect the game database")
+    parser.add_argument("--db", default=GAMES_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = commands.add_parser("import", help="append transcripts (one game per line)")
+    import_cmd.add_argument("input", nargs="?", default="-")
+    export_cmd = commands.add_parser("export", help="write every game as a transcript line")
+    export_cmd.add_argument("--start", type=int, default=0, help="first game number")
+    show = commands.add_parser("show", help="print game N with its final score")
+    show.add_argument("n", type=int)
+    commands.add_parser("stats", help="number of games and results")
+    commands.add_parser("reindex", help="rebuild the offset index from the data file")
+
+    args = parser.parse_args()
+    db = GameDatabase(args.db)
+    try:
+        if args.command == "import":
+            source = sys.stdin if args.input == "-" else open(args.input)
+            batch, skipped, imported = [], 0, 0
+            for line in source:
+                text = line.strip()
+                if not text:
+                    continue
+                try:
+                    batch.append(from_transcript(text))
+                except ValueError as exc:
+                    skipped += 1
+                    print(f"skipped {text[:20]}...: {exc}", file=sys.stderr)
+                if len(batch) >= 10000:
+                    imported += len(db.extend(batch))
+                    batch = []
+            imported += len(db.extend(batch))
+            print(f"Imported {imported} games ({skipped} skipped); {len(db)} in {args.db}")
+        elif args.command == "export":
+            out = sys.stdout
+            for n in range(args.start, len(db)):
+                out.write(to_transcript(db[n]) + "\n")
+        elif args.command == "show":
+            moves = db[args.n]
+            black, white = final_position(moves).get_score()
+            print(f"Game {args.n}: {to_transcript(moves)}")
+            print(f"{len(moves)} moves, black {black} - white {white}")
+        elif args.command == "stats":
+            results = {"black": 0, "white": 0, "draw": 0}
+            for moves in db:
+                black, white = final_position(moves).get_score()
+                results["black" if black > white else "white" if white > black else "draw"] += 1
+            print(f"{len(db)} games: black wins {results['black']}, white wins {results['white']}, "
+                  f"draws {results['draw']}")
+        elif args.command == "reindex":
+            db.rebuild_index()
+            print(f"Indexed {len(db)} games")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from bitboard import as_position, get_opponent
+from transposition import ZOBRIST_WHITE_TO_MOVE, zobrist_hash
+
+
+class GameState:
+    # Everything the game loop needs to know about a position, computed once
+    # when the position is reached: legal moves for both sides, the score,
+    # whether the side to move has to pass or the game is over, and the
+    # position hash. The position is a private copy, so later moves on the
+    # live board do not change it.
+
+    def __init__(self, board, current_player):
+        self.position = as_position(board).copy()
+        self.current_player = current_player
+        self.moves = {
+            "black": self.position.get_valid_moves("black"),
+            "white": self.position.get_valid_moves("white"),
+        }
+        self.score = self.position.get_score()
+        self.key = zobrist_hash(self.position, current_player)
+        self.game_over = not self.moves["black"] and not self.moves["white"]
+        self.passed = False  # the other side had no move, so current_player moves again
+
+    @property
+    def valid_moves(self):
+        return self.moves[self.current_player]
+
+    @property
+    def must_pass(self):
+        return not self.game_over and not self.valid_moves
+
+    def for_player(self, player):
+        # Same position with `player` to move, reusing the computed moves
+        if player == self.current_player:
+            return self
+        state = GameState.__new__(GameState)
+        state.__dict__.update(self.__dict__)
+        state.current_player = player
+        state.key = self.key ^ ZOBRIST_WHITE_TO_MOVE
+        return state
+
+
+def next_state(board, mover):
+    # State after `mover` has played on `board`: the opponent to move, or
+    # `mover` again (with passed set) if the opponent has no legal move
+    state = GameState(board, get_opponent(mover))
+    if state.must_pass:
+        state = state.for_player(mover)
+        state.passed = True
+    return state
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from bitboard import Position, get_opponent, square_name
+from game_state import GameState, next_state
+
+# Game history as a move log. Each ply keeps (square, player, flips), which is
+# all position.undo needs, so undo and redo are O(1) and the position is never
+# copied. Undone plies stay in the log until a different move is played, so
+# they can be redone.
+
+ENGINE_CACHE_SIZE = 256  # positions whose engine answer is kept
+
+
+class MoveLog:
+    def __init__(self, position=None, first_player="black"):
+        self.position = position if position is not None else Position.initial()
+        self.first_player = first_player
+        self.entries = []  # (square, player, flips) per ply
+        self.ply = 0       # entries[:ply] are on the board
+
+    @property
+    def can_undo(self):
+        return self.ply > 0
+
+    @property
+    def can_redo(self):
+        return self.ply < len(self.entries)
+
+    def play(self, sq, player):
+        # A new move drops any undone plies
+        flips = self.position.play(sq, player)
+        del self.entries[self.ply:]
+        self.entries.append((sq, player, flips))
+        self.ply += 1
+        return flips
+
+    def undo(self):
+        # Takes back the last ply; returns its entry
+        self.ply -= 1
+        sq, player, flips = entry = self.entries[self.ply]
+        self.position.undo(sq, player, flips)
+        return entry
+
+    def redo(self):
+        sq, player, flips = entry = self.entries[self.ply]
+        self.position.play(sq, player)
+        self.ply += 1
+        return entry
+
+    def goto(self, ply):
+        # Replays or takes back moves until `ply` moves are on the board
+        if not 0 <= ply <= len(self.entries):
+            raise IndexError(f"ply {ply} out of range (0-{len(self.entries)})")
+        while self.ply > ply:
+            self.undo()
+        while self.ply < ply:
+            self.redo()
+
+    def state(self):
+        # GameState of the current ply, passes included
+        if self.ply == 0:
+            return GameState(self.position, self.first_player)
+        return next_state(self.position, self.entries[self.ply - 1][1])
+
+    def last_player(self):
+        return self.entries[self.ply - 1][1] if self.ply else get_opponent(self.first_player)
+
+    # --- Export ---
+
+    def moves(self):
+        # Squares on the board, one byte each as in game_record
+        return bytes(sq for sq, _, _ in self.entries[:self.ply])
+
+    def transcript(self):
+        return "".join(square_name(sq) for sq, _, _ in self.entries[:self.ply])
+
+
+class EngineCache:
+    # Engine answers by position hash, so returning to a position (undo, or
+    # the same line played again) reuses the move instead of searching again
+    def __init__(self, size=ENGINE_CACHE_SIZE):
+        self.size = size
+        self._results = OrderedDict()
+
+    def get(self, key):
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+        return result
+
+    def store(self, key, move, stats=None):
+        self._results[key] = (move, stats)
+        self._results.move_to_end(key)
+        while len(self._results) > self.size:
+            self._results.popitem(last=False)
@@ -5,30 +5,42 @@ Intro Artificial Intelligence
 Date of Submission: 11/10/2025
 """
 
-import pygame
-import asyncio
-from menu import show_menu
-from game import start_game
-
-pygame.init()
-
 # Window setup
 WIDTH, HEIGHT = 640, 720  # 80 extra px for top and bottom bars
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Othello Game")
 
-state = "MENU"
-player_color = "black"  # default
-clock = pygame.time.Clock()
 
-while True:
-    if state == "MENU":
-        state, player_color = show_menu(screen)
+def main():
+    # Everything loads here rather than at module level, so the AI workers'
+    # re-import of this module costs nothing and stays free of pygame
+    import asyncio
+    import pygame
+    from menu import show_menu
+    from game import start_game
+    from minimax_ai import shutdown_executor
+
+    pygame.init()
+
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Othello Game")
+
+    state = "MENU"
+    player_color = "black"  # default
+
+    while True:
+        if state == "MENU":
+            state, player_color = show_menu(screen)
+
+        elif state == "GAME":
+            state = asyncio.run(start_game(screen, player_color))
+
+        elif state == "QUIT":
+            break
 
-    elif state == "GAME":
-        state = asyncio.run(start_game(screen, player_color))
+    shutdown_executor()
+    pygame.quit()
 
-    elif state == "QUIT":
-        break
 
-pygame.quit()
\ No newline at end of file
+# The AI worker process re-imports this module, so only the GUI entry point
+# may open the window.
+if __name__ == "__main__":
+    main()
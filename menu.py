@@ -1,4 +1,5 @@
 import pygame
+from renderer import FRAME_CAP
 
 
 def show_menu(screen):
@@ -38,6 +39,7 @@ def show_menu(screen):
 
     title_text = title_font.render("Othello", True, (255, 255, 255))
     title_rect = title_text.get_rect(center=(screen_width // 2, 100))
+    clock = pygame.time.Clock()
 
     while True:
         screen.fill((0, 100, 0))  # Green background
@@ -59,6 +61,7 @@ def show_menu(screen):
 
         # Render screen updates
         pygame.display.flip()
+        clock.tick(FRAME_CAP)  # don't spin a whole core on the menu
 
         # Event handling
         for event in pygame.event.get():
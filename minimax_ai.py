@@ -1,172 +1,672 @@
-import copy
 import math
-import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import queue
 import time
-from board import make_move, get_valid_moves, get_score
+import types
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import Position, as_position, legal_moves
+from endgame import ENDGAME_EMPTIES, solve_endgame
+from move_ordering import MoveOrderer
+from patterns import border_score, pattern_tables
+from search_stats import SearchStats
+from transposition import EXACT, LOWER, UPPER, TranspositionTable, update_hash, zobrist_hash
 
-MAX_DEPTH = 4  # Technically 5 ply since it stops at 0
+MAX_DEPTH = 60  # Upper bound for iterative deepening; capped by the empty squares left
+ENDGAME_TIME_FRACTION = 0.5  # share of the budget the exact solver may use before falling back
+# Search modes: "alphabeta" is the min/max search below, "pvs" the negamax
+# principal variation search with aspiration windows at the root
+SEARCH_MODES = ("alphabeta", "pvs")
+ASPIRATION_WINDOW = 40  # half-width of the root window around the previous iteration's score
 
 
-async def start_minimax_async(board, player_color, ai_color, time_limit=30):
-    start_time = time.time()
-    score, move, _ = await minimax_async(board, MAX_DEPTH, True, player_color, ai_color, start_time, time_limit)
-    return score, move
+class SearchContext:
+    # State shared by every node of one search
+    def __init__(self, player_color, ai_color, start_time, time_limit, tt=None, orderer=None, endgame_empties=ENDGAME_EMPTIES):
+        self.player_color = player_color
+        self.ai_color = ai_color
+        self.start_time = start_time
+        self.time_limit = time_limit
+        # A table passed in by the caller keeps its entries between moves
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.orderer = orderer if orderer is not None else MoveOrderer()
+        self.endgame_empties = endgame_empties  # solve exactly at or below this many empties
+        self.root_depth = 0
+        self.stats = SearchStats()
+        # cooperative: yield to the event loop while searching (not needed in a worker)
+        self.cooperative = True
+        self.should_stop = None   # polled every 1000 nodes; True aborts like a timeout
+        self.stopped = False
+        self.on_iteration = None  # called with (depth, score, move) after each iteration
+        self.weights = None       # evaluate_board weights; None uses PHASE_WEIGHTS
+        self.search = "alphabeta"  # one of SEARCH_MODES
+        self.budget = None        # time_control.MoveBudget deciding on each next iteration; None uses time_limit only
+
+
+# The search coroutines only touch the event loop to yield in cooperative
+# mode, so this module does not import asyncio: worker processes run searches
+# with run_sync and start without it.
+
+@types.coroutine
+def _yield_to_loop():
+    # Same as asyncio.sleep(0): the running event loop gets one turn
+    yield
+
+
+def run_sync(coro):
+    # Runs a search coroutine with cooperative off to completion, without an
+    # event loop
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("a non-cooperative search yielded to the event loop")
+
+
+async def start_minimax_async(board, player_color, ai_color, time_limit=30, max_depth=MAX_DEPTH, tt=None, orderer=None,
+                              endgame_empties=ENDGAME_EMPTIES, weights=None, search="alphabeta", budget=None):
+    if search not in SEARCH_MODES:
+        raise ValueError(f"unknown search mode {search!r}; expected one of {SEARCH_MODES}")
+    ctx = SearchContext(player_color, ai_color, time.time(), time_limit, tt, orderer, endgame_empties)
+    ctx.weights = weights
+    ctx.search = search
+    ctx.budget = budget
+    return await iterative_deepening(ctx, as_position(board).copy(), max_depth)
+
+
+async def iterative_deepening(ctx, position, max_depth=MAX_DEPTH):
+    # Returns (score, move, stats); stats.depth is the depth reached
+    stats = ctx.stats
+    empties = 64 - position.num_discs()
+    if empties <= ctx.endgame_empties:
+        # --- Exact endgame ---
+        # The score is then the final disc difference for the AI. If the
+        # solver runs out of its share of time, the heuristic search continues.
+        deadline = ctx.start_time + ctx.time_limit * ENDGAME_TIME_FRACTION
+        solved = solve_endgame(position, ctx.ai_color, deadline=deadline, should_stop=ctx.should_stop)
+        if solved is not None:
+            score, move, nodes = solved
+            stats.nodes += nodes
+            stats.depth, stats.endgame = empties, True
+            stats.pv = [move[0] * 8 + move[1]] if move else []
+            stats.elapsed = time.time() - ctx.start_time
+            stats.iteration_times.append(stats.elapsed)
+            stats.iteration_nodes.append(nodes)
+            if ctx.on_iteration is not None:
+                ctx.on_iteration(empties, score, move)
+            return score, move, stats
+
+    max_depth = min(max_depth, empties)
+    ctx.tt.new_search()
+    ctx.orderer.new_search()
+    key = zobrist_hash(position, ctx.ai_color, ctx.ai_color)
 
+    # Only results from fully searched iterations are kept, so a timeout can
+    # never leak a partial score into the answer.
+    best_score, best_move, depth_reached = None, None, 0
+    iteration_scores = []
+    for depth in range(1, max_depth + 1):
+        iteration_start = time.time()
+        iteration_start_nodes = stats.nodes
+        ctx.root_depth = depth
+        if ctx.search == "pvs":
+            # Scores swing between odd and even depths, so the guess is the
+            # score from two iterations back
+            guess = iteration_scores[-2] if len(iteration_scores) >= 2 else None
+            score, move, timed_out = await aspiration_search(ctx, position, key, depth, guess)
+        else:
+            score, move, timed_out = await minimax_async(ctx, position, key, depth, True)
+        if timed_out:
+            break
+        best_score, best_move, depth_reached = score, move, depth
+        iteration_scores.append(score)
+        stats.iteration_times.append(time.time() - iteration_start)
+        stats.iteration_nodes.append(stats.nodes - iteration_start_nodes)
+        if ctx.on_iteration is not None:
+            ctx.on_iteration(depth, score, move)
 
-node_counter = 0  # global or passed in context
+        # The next iteration always takes longer than this one, so don't start
+        # it if it has no chance of finishing inside the budget.
+        now = time.time()
+        if (now - ctx.start_time) + (now - iteration_start) > ctx.time_limit:
+            break
+        if ctx.budget is not None and not ctx.budget.keep_searching(move, now - ctx.start_time, now - iteration_start):
+            break
 
+    if depth_reached == 0:
+        # Not even depth 1 finished: fall back to the first legal move
+        valid_moves = position.get_valid_moves(ctx.ai_color)
+        best_move = valid_moves[0] if valid_moves else None
 
-async def minimax_async(board, depth, maximizing_player, player_color, ai_color, start_time, time_limit=30, alpha=-math.inf, beta=math.inf):
-    global node_counter
-    node_counter += 1
-    if node_counter % 1000 == 0:  # yield every 500 nodes
-        await asyncio.sleep(0)
+    stats.depth = depth_reached
+    stats.elapsed = time.time() - ctx.start_time
+    if best_move is not None:
+        stats.pv = principal_variation(ctx, position, key, best_move[0] * 8 + best_move[1], max(depth_reached, 1))
+    return best_score, best_move, stats
 
-    if time.time() - start_time > time_limit:
+
+def principal_variation(ctx, position, key, first_square, length):
+    # Expected line from the root: the root move, then each position's best
+    # square from the transposition table while it is still a legal move
+    pv = []
+    played = []
+    sq, maximizing = first_square, True
+    while sq is not None and len(pv) < length:
+        color = ctx.ai_color if maximizing else ctx.player_color
+        flips = position.play(sq, color)
+        played.append((sq, color, flips))
+        key = update_hash(key, sq, flips, color)
+        pv.append(sq)
+        maximizing = not maximizing
+        entry = ctx.tt.probe(key)
+        next_color = ctx.ai_color if maximizing else ctx.player_color
+        sq = entry[4] if entry is not None else None
+        if sq is not None and not position.move_mask(next_color) >> sq & 1:
+            sq = None
+    for sq, color, flips in reversed(played):
+        position.undo(sq, color, flips)
+    return pv
+
+
+async def minimax_async(ctx, position, key, depth, maximizing_player, alpha=-math.inf, beta=math.inf):
+    stats = ctx.stats
+    stats.nodes += 1
+    if stats.nodes % 1000 == 0:
+        if ctx.cooperative:
+            await _yield_to_loop()  # yield every 1000 nodes
+        if ctx.should_stop is not None and ctx.should_stop():
+            ctx.stopped = True
+
+    if ctx.stopped or time.time() - ctx.start_time > ctx.time_limit:
         return 0, None, True  # timed out
 
     # Recursive base case
-    valid_moves = get_valid_moves(board, ai_color if maximizing_player else player_color)
-    if depth == 0 or not valid_moves:
-        return evaluate_board(board, ai_color, player_color), None, False
+    color = ctx.ai_color if maximizing_player else ctx.player_color
+    moves = 0
+    if depth > 0:
+        started = time.perf_counter()
+        moves = position.move_mask(color)
+        stats.movegen_time += time.perf_counter() - started
+    if not moves:
+        stats.leaf_evals += 1
+        started = time.perf_counter()
+        score = evaluate_board(position, ctx.ai_color, ctx.player_color, ctx.weights)
+        stats.eval_time += time.perf_counter() - started
+        return score, None, False
+
+    # --- Transposition table lookup ---
+    alpha_orig, beta_orig = alpha, beta
+    entry = ctx.tt.probe(key)
+    tt_square = entry[4] if entry is not None else None
+    if entry is not None and entry[1] >= depth:
+        _, _, bound, tt_score, _, _ = entry
+        if bound == EXACT:
+            return tt_score, divmod(tt_square, 8), False
+        elif bound == LOWER:
+            alpha = max(alpha, tt_score)
+        else:
+            beta = min(beta, tt_score)
+        if beta <= alpha:
+            return tt_score, divmod(tt_square, 8), False
 
-    best_move = None
-    timed_out = False
+    best_square = None
+    ply = ctx.root_depth - depth
+    ordered = ctx.orderer.order(position, moves, ply, color, tt_square)
 
     # --- Alpha-Beta pruning ---
+    # Children are searched on the same position object with play/undo
     if maximizing_player:
         max_eval = -math.inf
-        for move in valid_moves:
-            new_board = copy.deepcopy(board)
-            make_move(new_board, move[0], move[1], ai_color)
-            eval_score, _, child_timed_out = await minimax_async(new_board, depth-1, False, player_color, ai_color, start_time, time_limit, alpha, beta)
+        for index, sq in enumerate(ordered):
+            flips = position.play(sq, color)
+            child_key = update_hash(key, sq, flips, color)
+            eval_score, _, child_timed_out = await minimax_async(ctx, position, child_key, depth-1, False, alpha, beta)
+            position.undo(sq, color, flips)
+            if child_timed_out:
+                return 0, None, True  # discard the unfinished subtree
             if eval_score > max_eval:
                 max_eval = eval_score
-                best_move = move
+                best_square = sq
             alpha = max(alpha, eval_score)
             if beta <= alpha:
-                break
-            if child_timed_out:
-                timed_out = True
+                ctx.orderer.record_cutoff(sq, ply, color, depth)
+                stats.cutoffs += 1
+                stats.first_move_cutoffs += index == 0
                 break
 
-        return max_eval, best_move, timed_out
+        best_eval = max_eval
     else:
         min_eval = math.inf
-        for move in valid_moves:
-            new_board = copy.deepcopy(board)
-            make_move(new_board, move[0], move[1], player_color)
-            await asyncio.sleep(0)
-            eval_score, _, child_timed_out = await minimax_async(new_board, depth-1, True, player_color, ai_color, start_time, time_limit, alpha, beta)
+        for index, sq in enumerate(ordered):
+            flips = position.play(sq, color)
+            child_key = update_hash(key, sq, flips, color)
+            if ctx.cooperative:
+                await _yield_to_loop()
+            eval_score, _, child_timed_out = await minimax_async(ctx, position, child_key, depth-1, True, alpha, beta)
+            position.undo(sq, color, flips)
+            if child_timed_out:
+                return 0, None, True  # discard the unfinished subtree
             if eval_score < min_eval:
                 min_eval = eval_score
-                best_move = move
+                best_square = sq
             beta = min(beta, eval_score)
             if beta <= alpha:
-                break
-            if child_timed_out:
-                timed_out = True
+                ctx.orderer.record_cutoff(sq, ply, color, depth)
+                stats.cutoffs += 1
+                stats.first_move_cutoffs += index == 0
                 break
 
-        return min_eval, best_move, timed_out
+        best_eval = min_eval
 
+    # --- Transposition table store ---
+    if best_eval <= alpha_orig:
+        bound = UPPER
+    elif best_eval >= beta_orig:
+        bound = LOWER
+    else:
+        bound = EXACT
+    ctx.tt.store(key, depth, bound, best_eval, best_square)
 
-# Corner positions
-CORNERS = [(0, 0), (0, 7), (7, 0), (7, 7)]
-# Positions directly adjacent to corners
-NEARBY_OFFSETS = [(0,1),(1,0),(1,1), (0,-1),(-1,0),(-1,-1), (1,-1),(-1,1)]
+    best_move = divmod(best_square, 8)
+    return best_eval, best_move, False
 
 
-def evaluate_board(board, ai_color, player_color):
+# --- Principal variation search ---
+# Negamax form: scores are from the side to move, the AI's score negated at
+# the player's nodes. The first move of a node gets the full window, later
+# moves a null window that only proves them no better; one that turns out
+# better is searched again with the full window. The transposition table is
+# shared with minimax_async, so entries are converted to and from the AI's
+# point of view.
 
-    num_discs = sum(1 for row in board for cell in row if cell is not None)
-    phase = num_discs / 64.0  # 0 = start, 1 = end
+async def aspiration_search(ctx, position, key, depth, guess):
+    # Root search in a narrow window around the previous iteration's score.
+    # A result outside the window is only a bound, so that side of the window
+    # is opened and the depth searched again.
+    if guess is None:
+        return await pvs_async(ctx, position, key, depth, True, -math.inf, math.inf)
+    alpha, beta = guess - ASPIRATION_WINDOW, guess + ASPIRATION_WINDOW
+    while True:
+        score, move, timed_out = await pvs_async(ctx, position, key, depth, True, alpha, beta)
+        if timed_out:
+            return score, move, True
+        if score <= alpha:
+            alpha = -math.inf
+        elif score >= beta:
+            beta = math.inf
+        else:
+            return score, move, False
+        ctx.stats.aspiration_failures += 1
+
+
+async def pvs_async(ctx, position, key, depth, ai_to_move, alpha, beta):
+    stats = ctx.stats
+    stats.nodes += 1
+    if stats.nodes % 1000 == 0:
+        if ctx.cooperative:
+            await _yield_to_loop()  # yield every 1000 nodes
+        if ctx.should_stop is not None and ctx.should_stop():
+            ctx.stopped = True
+
+    if ctx.stopped or time.time() - ctx.start_time > ctx.time_limit:
+        return 0, None, True  # timed out
+
+    color = ctx.ai_color if ai_to_move else ctx.player_color
+    sign = 1 if ai_to_move else -1
+    moves = 0
+    if depth > 0:
+        started = time.perf_counter()
+        moves = position.move_mask(color)
+        stats.movegen_time += time.perf_counter() - started
+    if not moves:
+        stats.leaf_evals += 1
+        started = time.perf_counter()
+        score = evaluate_board(position, ctx.ai_color, ctx.player_color, ctx.weights)
+        stats.eval_time += time.perf_counter() - started
+        return sign * score, None, False
+
+    # --- Transposition table lookup ---
+    alpha_orig, beta_orig = alpha, beta
+    entry = ctx.tt.probe(key)
+    tt_square = entry[4] if entry is not None else None
+    if entry is not None and entry[1] >= depth:
+        _, _, bound, tt_score, _, _ = entry
+        tt_score *= sign
+        if not ai_to_move and bound != EXACT:
+            bound = UPPER if bound == LOWER else LOWER
+        if bound == EXACT:
+            return tt_score, divmod(tt_square, 8), False
+        elif bound == LOWER:
+            alpha = max(alpha, tt_score)
+        else:
+            beta = min(beta, tt_score)
+        if beta <= alpha:
+            return tt_score, divmod(tt_square, 8), False
+
+    best_score = -math.inf
+    best_square = None
+    ply = ctx.root_depth - depth
+    ordered = ctx.orderer.order(position, moves, ply, color, tt_square)
+
+    for index, sq in enumerate(ordered):
+        flips = position.play(sq, color)
+        child_key = update_hash(key, sq, flips, color)
+        if ctx.cooperative and not ai_to_move:
+            await _yield_to_loop()
+        if index == 0:
+            score, _, child_timed_out = await pvs_async(ctx, position, child_key, depth-1, not ai_to_move, -beta, -alpha)
+            score = -score
+        else:
+            score, _, child_timed_out = await pvs_async(ctx, position, child_key, depth-1, not ai_to_move,
+                                                        -alpha - 1, -alpha)
+            score = -score
+            if not child_timed_out and alpha < score < beta:
+                stats.re_searches += 1
+                score, _, child_timed_out = await pvs_async(ctx, position, child_key, depth-1, not ai_to_move,
+                                                            -beta, -alpha)
+                score = -score
+        position.undo(sq, color, flips)
+        if child_timed_out:
+            return 0, None, True  # discard the unfinished subtree
+        if score > best_score:
+            best_score = score
+            best_square = sq
+        alpha = max(alpha, score)
+        if beta <= alpha:
+            ctx.orderer.record_cutoff(sq, ply, color, depth)
+            stats.cutoffs += 1
+            stats.first_move_cutoffs += index == 0
+            break
+
+    # --- Transposition table store ---
+    if best_score <= alpha_orig:
+        bound = UPPER
+    elif best_score >= beta_orig:
+        bound = LOWER
+    else:
+        bound = EXACT
+    if not ai_to_move and bound != EXACT:
+        bound = UPPER if bound == LOWER else LOWER
+    ctx.tt.store(key, depth, bound, sign * best_score, best_square)
+
+    return best_score, divmod(best_square, 8), False
+
+
+# --- Worker-process search ---
+# The search runs in a ProcessPoolExecutor worker so it gets a full core and the
+# pygame loop never waits on it. Every search gets a sequence number: cancelling
+# publishes that number through a shared value the worker polls, and each
+# finished iteration is streamed back through a queue.
+
+MAX_WORKER_SESSIONS = 4      # transposition tables kept alive in the worker
+PROGRESS_POLL_INTERVAL = 0.05
+
+_executor = None
+_cancelled_upto = None
+_progress_queue = None
+_search_seq = itertools.count(1)
+
+# Set in the worker process by _init_worker
+_worker_cancelled = None
+_worker_progress = None
+_worker_alpha = None
+_worker_tables = OrderedDict()
+
+
+def _init_worker(cancelled_upto, progress_queue, shared_alpha=None):
+    global _worker_cancelled, _worker_progress, _worker_alpha
+    _worker_cancelled = cancelled_upto
+    _worker_progress = progress_queue
+    _worker_alpha = shared_alpha
 
-    # Coefficients
-    PIECE_DIFFERENCE_WEIGHT = 0             # Piece difference weight
-    MOBILITY_WEIGHT = 0                     # Mobility weight
-    CORNER_CONTROL_WEIGHT = 0               # Corner control weight
-    EDGE_CONTROL_WEIGHT = 0                 # Edge control weight
-    NEARBY_CORNERS_PENALTY_WEIGHT = 0       # Penalty for pieces near corners
+
+def _get_executor():
+    global _executor, _cancelled_upto, _progress_queue
+    if _executor is None:
+        mp_context = multiprocessing.get_context("spawn")
+        _cancelled_upto = mp_context.RawValue("q", 0)
+        _progress_queue = mp_context.Queue()
+        _executor = ProcessPoolExecutor(max_workers=1, mp_context=mp_context, initializer=_init_worker,
+                                        initargs=(_cancelled_upto, _progress_queue))
+    return _executor
+
+
+def shutdown_executor():
+    global _executor, _parallel_executor
+    if _executor is not None:
+        _cancelled_upto.value = next(_search_seq)  # stop anything still running
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+    if _parallel_executor is not None:
+        _parallel_cancelled.value = next(_search_seq)
+        _parallel_executor.shutdown(wait=True, cancel_futures=True)
+        _parallel_executor = None
+
+
+def session_table(session):
+    # One transposition table per game session, kept between that game's moves
+    # in this worker process while it is among the most recently used
+    if session is None:
+        return TranspositionTable()
+    tt = _worker_tables.pop(session, None)
+    if tt is None:
+        tt = TranspositionTable()
+    _worker_tables[session] = tt
+    while len(_worker_tables) > MAX_WORKER_SESSIONS:
+        _worker_tables.popitem(last=False)
+    return tt
+
+
+def _search_in_worker(seq, black, white, player_color, ai_color, time_limit, max_depth, session, budget=None):
+    ctx = SearchContext(player_color, ai_color, time.time(), time_limit, session_table(session))
+    ctx.cooperative = False
+    ctx.budget = budget
+    ctx.should_stop = lambda: _worker_cancelled.value >= seq
+    ctx.on_iteration = lambda depth, score, move: _worker_progress.put((seq, depth, score, move))
+    return run_sync(iterative_deepening(ctx, Position(black, white), max_depth))
+
+
+def _drain_progress(seq, on_progress):
+    while True:
+        try:
+            message = _progress_queue.get_nowait()
+        except queue.Empty:
+            return
+        # Messages from older (cancelled) searches are dropped
+        if message[0] == seq and on_progress is not None:
+            on_progress(*message[1:])
+
+
+async def start_minimax_in_executor(board, player_color, ai_color, time_limit=30, max_depth=MAX_DEPTH, session=None, on_progress=None,
+                                    budget=None):
+    # Same result as start_minimax_async, computed in the worker process.
+    # on_progress(depth, score, move) is called as iterations complete.
+    import asyncio  # loaded already: this runs on the caller's event loop
+    executor = _get_executor()
+    seq = next(_search_seq)
+    position = as_position(board)
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, _search_in_worker, seq, position.black, position.white,
+                                  player_color, ai_color, time_limit, max_depth, session, budget)
+    try:
+        while True:
+            done, _ = await asyncio.wait([future], timeout=PROGRESS_POLL_INTERVAL)
+            _drain_progress(seq, on_progress)
+            if done:
+                return future.result()
+    except asyncio.CancelledError:
+        _cancelled_upto.value = max(_cancelled_upto.value, seq)
+        raise
+
+
+# --- Parallel root-splitting search ---
+# Each iteration searches the root moves on a pool of worker processes. The
+# expected best move is searched first, on its own, then the remaining moves
+# run in parallel. The best score found so far is shared through a
+# process-wide value and used as every new root move's alpha bound.
+
+_parallel_executor = None
+_parallel_workers = 0
+_parallel_cancelled = None
+_parallel_alpha = None
+
+
+def _get_parallel_executor(workers):
+    global _parallel_executor, _parallel_workers, _parallel_cancelled, _parallel_alpha
+    if _parallel_executor is not None and _parallel_workers != workers:
+        _parallel_executor.shutdown(wait=True, cancel_futures=True)
+        _parallel_executor = None
+    if _parallel_executor is None:
+        mp_context = multiprocessing.get_context("spawn")
+        _parallel_cancelled = mp_context.RawValue("q", 0)
+        _parallel_alpha = mp_context.Value("d", -math.inf)
+        _parallel_executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_worker,
+                                                 initargs=(_parallel_cancelled, None, _parallel_alpha))
+        _parallel_workers = workers
+    return _parallel_executor
+
+
+def _search_root_move(seq, black, white, player_color, ai_color, sq, depth, time_limit, session):
+    position = Position(black, white)
+    position.play(sq, ai_color)
+    ctx = SearchContext(player_color, ai_color, time.time(), time_limit, session_table(session))
+    ctx.cooperative = False
+    ctx.should_stop = lambda: _worker_cancelled.value >= seq
+    ctx.root_depth = depth
+    # Scores are integers, so searching above alpha - 1 still gives an exact
+    # score for a move that ties the current best and the parent can break
+    # ties by root order.
+    alpha = _worker_alpha.value - 1
+    key = zobrist_hash(position, player_color, ai_color)
+    score, _, timed_out = run_sync(minimax_async(ctx, position, key, depth - 1, False, alpha, math.inf))
+    if not timed_out:
+        with _worker_alpha.get_lock():
+            if score > _worker_alpha.value:
+                _worker_alpha.value = score
+    return score, timed_out, ctx.stats
+
+
+async def start_minimax_parallel(board, player_color, ai_color, time_limit=30, max_depth=MAX_DEPTH, workers=None, session=None):
+    # Iterative deepening with root splitting; returns the same (score, move,
+    # stats) as start_minimax_async. workers defaults to one per CPU.
+    import asyncio  # loaded already: this runs on the caller's event loop
+    workers = workers or os.cpu_count() or 1
+    executor = _get_parallel_executor(workers)
+    loop = asyncio.get_running_loop()
+    start_time = time.time()
+    position = as_position(board).copy()
+    max_depth = min(max_depth, 64 - position.num_discs())
+
+    stats = SearchStats()
+    root = MoveOrderer().order(position, position.move_mask(ai_color), 0, ai_color)
+    if not root:
+        return evaluate_board(position, ai_color, player_color), None, stats
+
+    best_score, best_move, depth_reached = None, None, 0
+    for depth in range(1, max_depth + 1):
+        iteration_start = time.time()
+        seq = next(_search_seq)
+        _parallel_alpha.value = -math.inf
+        remaining = time_limit - (iteration_start - start_time)
+
+        def submit(sq):
+            return loop.run_in_executor(executor, _search_root_move, seq, position.black, position.white,
+                                        player_color, ai_color, sq, depth, remaining, session)
+
+        try:
+            results = [await submit(root[0])]
+            if not results[0][1]:
+                results += await asyncio.gather(*[submit(sq) for sq in root[1:]])
+        except asyncio.CancelledError:
+            _parallel_cancelled.value = max(_parallel_cancelled.value, seq)
+            raise
+
+        iteration_nodes = 0
+        for _, _, move_stats in results:
+            stats.merge(move_stats)
+            iteration_nodes += move_stats.nodes
+        if any(timed_out for _, timed_out, _ in results):
+            break
+        stats.iteration_times.append(time.time() - iteration_start)
+        stats.iteration_nodes.append(iteration_nodes)
+
+        # Highest score wins; ties go to the earliest move in root order
+        best_score = max(score for score, _, _ in results)
+        index = next(i for i, (score, _, _) in enumerate(results) if score == best_score)
+        best_move, depth_reached = divmod(root[index], 8), depth
+        root.insert(0, root.pop(index))  # search the best move first next time
+
+        now = time.time()
+        if (now - start_time) + (now - iteration_start) > time_limit:
+            break
+
+    if depth_reached == 0:
+        best_move = divmod(root[0], 8)
+
+    stats.depth = depth_reached
+    stats.pv = [best_move[0] * 8 + best_move[1]]  # worker tables stay in the workers
+    stats.elapsed = time.time() - start_time
+    return best_score, best_move, stats
+
+
+# Evaluation weights per game phase, applied in this order:
+# (piece difference, mobility, corner control, edge control, nearby-corners penalty)
+DEFAULT_PHASE_WEIGHTS = (
+    (5, 30, 60, 10, 10),    # Opening: prioritize mobility and corner potential
+    (10, 15, 80, 20, 5),    # Mid-game: balance mobility and edge control
+    (40, 5, 100, 20, 2),    # Endgame: raw piece advantage and corner control matters
+)
+# Tuned weights written by tuning.py replace the defaults when present
+WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "weights.json")
+
+
+def load_weights(path=WEIGHTS_PATH):
+    # Weights tuple from a tuning.py weights file, or None if there is none
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        phases = json.load(f)["phases"]
+    if len(phases) != 3 or any(len(phase) != 5 for phase in phases):
+        raise ValueError(f"{path}: expected 3 phases of 5 weights")
+    return tuple(tuple(phase) for phase in phases)
+
+
+PHASE_WEIGHTS = load_weights() or DEFAULT_PHASE_WEIGHTS
+
+
+def evaluate_board(board, ai_color, player_color, weights=None):
+    ai, player = as_position(board).bits(ai_color)
+    weights = weights or PHASE_WEIGHTS
+
+    num_discs = (ai | player).bit_count()
+    phase = num_discs / 64.0  # 0 = start, 1 = end
 
     # --- Game phase detection ---
     if phase < 0.4:
-        # Opening: prioritize mobility and corner potential
-        PIECE_DIFFERENCE_WEIGHT, MOBILITY_WEIGHT, CORNER_CONTROL_WEIGHT, EDGE_CONTROL_WEIGHT, NEARBY_CORNERS_PENALTY_WEIGHT = 5, 30, 60, 10, 10
+        phase_index = 0
     elif phase < 0.8:
-        # Mid-game: balance mobility and edge control
-        PIECE_DIFFERENCE_WEIGHT, MOBILITY_WEIGHT, CORNER_CONTROL_WEIGHT, EDGE_CONTROL_WEIGHT, NEARBY_CORNERS_PENALTY_WEIGHT = 10, 15, 80, 20, 5
+        phase_index = 1
     else:
-        # Endgame: raw piece advantage and corner control matters
-        PIECE_DIFFERENCE_WEIGHT, MOBILITY_WEIGHT, CORNER_CONTROL_WEIGHT, EDGE_CONTROL_WEIGHT, NEARBY_CORNERS_PENALTY_WEIGHT = 40, 5, 100, 20, 2
+        phase_index = 2
+    PIECE_DIFFERENCE_WEIGHT, MOBILITY_WEIGHT = weights[phase_index][:2]
 
     # --- Piece difference ---
-    black_score, white_score = get_score(board)
-    if ai_color == "black":
-        piece_diff = black_score - white_score
-    else:
-        piece_diff = white_score - black_score
+    piece_diff = ai.bit_count() - player.bit_count()
 
     # --- Mobility ---
-    ai_moves = len(get_valid_moves(board, ai_color))
-    player_moves = len(get_valid_moves(board, player_color))
-    mobility = ai_moves - player_moves
-
-    # --- Corner control ---
-    player_corners = sum(1 for r, c in CORNERS if board[r][c] == ai_color)
-    opp_corners = sum(1 for r, c in CORNERS if board[r][c] == player_color)
-    corner_control = player_corners - opp_corners
-
-    # --- Edge control ---
-    ai_edges = 0
-    player_edges = 0
-
-    # Top and bottom rows (excluding corners)
-    for j in range(1, 7):
-        if board[0][j] == ai_color:
-            ai_edges += 1
-        elif board[0][j] == player_color:
-            player_edges += 1
-        if board[7][j] == ai_color:
-            ai_edges += 1
-        elif board[7][j] == player_color:
-            player_edges += 1
-
-    # Left and right columns (excluding corners)
-    for i in range(1, 7):
-        if board[i][0] == ai_color:
-            ai_edges += 1
-        elif board[i][0] == player_color:
-            player_edges += 1
-        if board[i][7] == ai_color:
-            ai_edges += 1
-        elif board[i][7] == player_color:
-            player_edges += 1
-
-    edge_control = ai_edges - player_edges
-
-    # --- Nearby corners penalty ---
-    ai_near = 0
-    player_near = 0
-    for (cRow, cCol) in CORNERS:
-        corner_owner = board[cRow][cCol]
-        for dRow, dCol in NEARBY_OFFSETS:
-            nRow, nCol = cRow + dRow, cCol + dCol
-            if 0 <= nRow < 8 and 0 <= nCol < 8:
-                cell = board[nRow][nCol]
-                # Only penalize nearby squares if the corner is NOT owned by that player
-                if cell == ai_color and corner_owner != ai_color:
-                    ai_near += 1
-                elif cell == player_color and corner_owner != player_color:
-                    player_near += 1
-
-    nearby_corners = ai_near - player_near
+    mobility = legal_moves(ai, player).bit_count() - legal_moves(player, ai).bit_count()
+
+    # --- Corner control, edge control and nearby corners penalty ---
+    # Already weighted, from the pattern tables of the four board edges
+    border = border_score(ai, player, pattern_tables(weights)[phase_index])
 
     # --- Final evaluation ---
     score = (PIECE_DIFFERENCE_WEIGHT * piece_diff +
              MOBILITY_WEIGHT * mobility +
-             CORNER_CONTROL_WEIGHT * corner_control +
-             EDGE_CONTROL_WEIGHT * edge_control -
-             NEARBY_CORNERS_PENALTY_WEIGHT * nearby_corners)
+             border)
 
     return score
@@ -0,0 +1,88 @@
+from bitboard import get_opponent, iter_squares
+
+# Static square priority: corners are the best squares, X-squares (diagonal to a
+# corner) the worst, C-squares (edge squares next to a corner) poor.
+SQUARE_PRIORITY = [
+    100, -20,  10,   5,   5,  10, -20, 100,
+    -20, -50,  -2,  -2,  -2,  -2, -50, -20,
+     10,  -2,   1,   1,   1,   1,  -2,  10,
+      5,  -2,   1,   0,   0,   1,  -2,   5,
+      5,  -2,   1,   0,   0,   1,  -2,   5,
+     10,  -2,   1,   1,   1,   1,  -2,  10,
+    -20, -50,  -2,  -2,  -2,  -2, -50, -20,
+    100, -20,  10,   5,   5,  10, -20, 100,
+]
+
+MAX_PLY = 64
+
+
+class MoveOrderer:
+    # Ranks the moves of a node for alpha-beta: hash move, then killer moves for
+    # the ply, then history-heuristic score, then the static square table.
+    # Each stage can be switched off; with everything off moves come back in
+    # row-major order. Near the root (ply < shallow_plies) a one-ply evaluation
+    # of every child replaces the history/static ranking.
+
+    def __init__(self, hash_move=True, killers=True, history=True, static=True, shallow_plies=0, evaluate=None):
+        self.use_hash_move = hash_move
+        self.use_killers = killers
+        self.use_history = history
+        self.use_static = static
+        self.shallow_plies = shallow_plies if evaluate is not None else 0
+        self.evaluate = evaluate
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = {"black": [0] * 64, "white": [0] * 64}
+
+    def order(self, position, moves, ply, color, tt_square=None):
+        squares = list(iter_squares(moves))
+        if len(squares) < 2:
+            return squares
+
+        hash_square = tt_square if self.use_hash_move else None
+        killers = self.killers[ply] if self.use_killers else (None, None)
+        history = self.history[color]
+
+        shallow = None
+        if ply < self.shallow_plies:
+            opponent = get_opponent(color)
+            shallow = {}
+            for sq in squares:
+                flips = position.play(sq, color)
+                shallow[sq] = self.evaluate(position, color, opponent)
+                position.undo(sq, color, flips)
+
+        def rank(sq):
+            if sq == hash_square:
+                return 3, 0
+            if sq == killers[0]:
+                return 2, 1
+            if sq == killers[1]:
+                return 2, 0
+            if shallow is not None:
+                return 1, shallow[sq]
+            score = 0
+            if self.use_history:
+                score += history[sq] * 256
+            if self.use_static:
+                score += SQUARE_PRIORITY[sq]
+            return 0, score
+
+        # Stable sort, so equal ranks keep row-major order
+        squares.sort(key=rank, reverse=True)
+        return squares
+
+    def record_cutoff(self, sq, ply, color, depth):
+        if self.use_killers:
+            killers = self.killers[ply]
+            if killers[0] != sq:
+                killers[1] = killers[0]
+                killers[0] = sq
+        if self.use_history:
+            self.history[color][sq] += depth * depth
+
+    def new_search(self):
+        # Killers are only meaningful inside one search; history decays
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        for table in self.history.values():
+            for sq in range(64):
+                table[sq] >>= 1
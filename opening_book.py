@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import math
+import mmap
+import os
+import struct
+from bitboard import Position, as_position, get_opponent, iter_squares, position_from_transcript, square_name
+from minimax_ai import start_minimax_async
+from transposition import zobrist_hash
+
+# Opening book stored as a sorted array of fixed-size records, looked up by
+# binary search through mmap so the file is never read into memory.
+#
+# File layout: MAGIC, record count (u32), then records sorted by key:
+#   key (u64)    Zobrist hash of the position canonicalized under the 8 board symmetries
+#   score (i16)  engine score for the side to move
+#   move (u8)    best square, in canonical orientation
+#   depth (u8)   search depth the move came from
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+MAGIC = b"OTHBOOK1"
+HEADER = struct.Struct("<8sI")
+RECORD = struct.Struct("<QhBB")
+
+# --- Board symmetries ---
+_REVERSED_BITS = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+
+def flip_vertical(x):
+    # Row r <-> row 7 - r
+    return int.from_bytes(x.to_bytes(8, "little"), "big")
+
+
+def mirror_horizontal(x):
+    # Column c <-> column 7 - c
+    return int.from_bytes(x.to_bytes(8, "little").translate(_REVERSED_BITS), "little")
+
+
+def transpose(x):
+    # (row, col) <-> (col, row)
+    t = 0x0F0F0F0F00000000 & (x ^ (x << 28))
+    x ^= t ^ (t >> 28)
+    t = 0x3333000033330000 & (x ^ (x << 14))
+    x ^= t ^ (t >> 14)
+    t = 0x5500550055005500 & (x ^ (x << 7))
+    x ^= t ^ (t >> 7)
+    return x
+
+
+def _compose(*steps):
+    def transform(x):
+        for step in steps:
+            x = step(x)
+        return x
+    return transform
+
+
+SYMMETRIES = [
+    _compose(*steps)
+    for steps in (
+        (), (flip_vertical,), (mirror_horizontal,), (flip_vertical, mirror_horizontal),
+        (transpose,), (transpose, flip_vertical), (transpose, mirror_horizontal),
+        (transpose, flip_vertical, mirror_horizontal),
+    )
+]
+
+
+def canonicalize(position):
+    # Returns (black, white, transform) for the smallest of the 8 symmetric
+    # images of the position.
+    best = None
+    for transform in SYMMETRIES:
+        image = (transform(position.black), transform(position.white))
+        if best is None or image < best[:2]:
+            best = (image[0], image[1], transform)
+    return best
+
+
+def book_key(position, to_move):
+    black, white, transform = canonicalize(position)
+    return zobrist_hash(Position(black, white), to_move), transform
+
+
+class OpeningBook:
+    def __init__(self, path=BOOK_PATH):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an opening book")
+
+    @classmethod
+    def open_default(cls):
+        # None when no book has been built yet
+        if not os.path.exists(BOOK_PATH):
+            return None
+        return cls(BOOK_PATH)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _record(self, index):
+        return RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+
+    def _find(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._record(mid)
+            if record[0] < key:
+                lo = mid + 1
+            elif record[0] > key:
+                hi = mid
+            else:
+                return record
+        return None
+
+    def lookup(self, board, to_move):
+        # Book move as (row, col) for `to_move`, or None when out of book
+        position = as_position(board)
+        key, transform = book_key(position, to_move)
+        record = self._find(key)
+        if record is None:
+            return None
+        canonical_bit = 1 << record[2]
+        # Map the canonical move back through the same symmetry
+        for sq in iter_squares(position.move_mask(to_move)):
+            if transform(1 << sq) == canonical_bit:
+                return divmod(sq, 8)
+        return None
+
+    def records(self):
+        for index in range(self.count):
+            yield self._record(index)
+
+
+def write_book(path, records):
+    # records: {key: (score, move, depth)}; replaces the file atomically
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records)))
+        for key in sorted(records):
+            score, move, depth = records[key]
+            f.write(RECORD.pack(key, max(-32768, min(32767, score)), move, depth))
+    os.replace(tmp_path, path)
+
+
+# --- Builder ---
+
+def build_book(path=BOOK_PATH, plies=12, full_width=4, depth=6, start=""):
+    # Searches every position reachable from `start` by trying all moves for
+    # the first `full_width` plies and only the engine's choice after that,
+    # up to `plies`. Positions already in an existing book are kept.
+    records = {}
+    if os.path.exists(path):
+        book = OpeningBook(path)
+        records = {key: (score, move, book_depth) for key, score, move, book_depth in book.records()}
+        book.close()
+    added = 0
+
+    position, to_move = position_from_transcript(start)
+    frontier = [(position, to_move, len(start) // 2)]
+    seen = set()
+    while frontier:
+        position, to_move, ply = frontier.pop()
+        key, transform = book_key(position, to_move)
+        if key in seen or ply >= plies or not position.move_mask(to_move):
+            continue
+        seen.add(key)
+
+        if key in records and records[key][2] >= depth:
+            score, canonical_move, _ = records[key]
+            move = next(divmod(sq, 8) for sq in iter_squares(position.move_mask(to_move))
+                        if transform(1 << sq) == 1 << canonical_move)
+        else:
+            score, move, _ = asyncio.run(start_minimax_async(position, get_opponent(to_move), to_move, math.inf, depth))
+            canonical_move = transform(1 << (move[0] * 8 + move[1])).bit_length() - 1
+            records[key] = (score, canonical_move, depth)
+            added += 1
+
+        children = position.get_valid_moves(to_move) if ply < full_width else [move]
+        for row, col in children:
+            child = position.copy()
+            child.make_move(row, col, to_move)
+            next_to_move = get_opponent(to_move)
+            if not child.move_mask(next_to_move):
+                next_to_move = to_move
+            frontier.append((child, next_to_move, ply + 1))
+
+    write_book(path, records)
+    return added, len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the opening book")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="generate or extend the book from engine searches")
+    build.add_argument("--output", default=BOOK_PATH)
+    build.add_argument("--plies", type=int, default=12, help="deepest ply stored in the book")
+    build.add_argument("--full-width", type=int, default=4, help="plies where every move is expanded")
+    build.add_argument("--depth", type=int, default=6, help="search depth per book position")
+    build.add_argument("--start", default="", help="only extend lines after this transcript, e.g. f5d6")
+
+    lookup = commands.add_parser("lookup", help="print the book move after a transcript")
+    lookup.add_argument("transcript", nargs="?", default="")
+    lookup.add_argument("--book", default=BOOK_PATH)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        added, total = build_book(args.output, args.plies, args.full_width, args.depth, args.start)
+        print(f"Added {added} positions; {args.output} now holds {total}")
+    elif args.command == "lookup":
+        position, to_move = position_from_transcript(args.transcript)
+        move = OpeningBook(args.book).lookup(position, to_move)
+        print(square_name(move[0] * 8 + move[1]) if move else "out of book")
+
+
+if __name__ == "__main__":
+    main()
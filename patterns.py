@@ -0,0 +1,75 @@
+from functools import lru_cache
+from bitboard import square_bit
+
+# Border features of evaluate_board (corner control, edge control and the
+# nearby-corners penalty) as precomputed pattern tables. Every one of these
+# features depends on one side's discs only, so a side's border value is the
+# sum of four pattern lookups indexed directly by that side's bits:
+#   row patterns     top / bottom row plus the two X-squares next to it
+#   column patterns  left / right column
+# The bottom row and right column are read in the same bit layout as the top
+# row and left column, so each pattern type needs one table. Corners and
+# X-squares belong to the row patterns only, so nothing is counted twice.
+
+# Corner positions
+CORNERS = [(0, 0), (0, 7), (7, 0), (7, 7)]
+# Positions directly adjacent to corners
+NEARBY_OFFSETS = [(0,1),(1,0),(1,1), (0,-1),(-1,0),(-1,-1), (1,-1),(-1,1)]
+
+# --- Bitboard masks for the evaluation features ---
+CORNER_MASK = sum(square_bit(r, c) for r, c in CORNERS)
+EDGE_MASK = (sum(square_bit(0, j) | square_bit(7, j) for j in range(1, 7)) |
+             sum(square_bit(i, 0) | square_bit(i, 7) for i in range(1, 7)))
+# (corner bit, mask of the on-board squares next to that corner)
+CORNER_NEIGHBOURS = [
+    (square_bit(r, c),
+     sum(square_bit(r + dr, c + dc) for dr, dc in NEARBY_OFFSETS if 0 <= r + dr < 8 and 0 <= c + dc < 8))
+    for r, c in CORNERS
+]
+
+# --- Pattern layouts ---
+ROW_PATTERN = 0x42FF       # top row and the X-squares b2, g2, as board bits
+A_FILE = 0x0101010101010101
+COLUMN_MAGIC = 0x0102040810204080  # gathers the A-file into the top byte, row r -> bit r
+
+
+def _side_value(bits, corner_w, edge_w, nearby_w):
+    # Weighted border features of one side's discs `bits`
+    value = corner_w * (bits & CORNER_MASK).bit_count() + edge_w * (bits & EDGE_MASK).bit_count()
+    for corner, nearby in CORNER_NEIGHBOURS:
+        # Only penalize nearby squares if the corner is NOT owned by that side
+        if not bits & corner:
+            value -= nearby_w * (bits & nearby).bit_count()
+    return value
+
+
+def _column_bits(index):
+    # Column pattern index -> A-file bitboard
+    return sum(square_bit(r, 0) for r in range(8) if index >> r & 1)
+
+
+@lru_cache(maxsize=16)
+def pattern_tables(weights):
+    # Per game phase, the (row table, column table) of a PHASE_WEIGHTS-style
+    # weights tuple. Row indexes are board bits, so unused ones stay 0.
+    tables = []
+    for _, _, corner_w, edge_w, nearby_w in weights:
+        row_table = [0] * (ROW_PATTERN + 1)
+        for index in range(ROW_PATTERN + 1):
+            if index & ~ROW_PATTERN == 0:
+                row_table[index] = _side_value(index, corner_w, edge_w, nearby_w)
+        # Corner control is counted by the row patterns
+        column_table = [_side_value(_column_bits(index), 0, edge_w, nearby_w) for index in range(256)]
+        tables.append((row_table, column_table))
+    return tuple(tables)
+
+
+def border_score(own, opp, tables):
+    # Corner, edge and nearby-corner part of the evaluation for `own`
+    row, column = tables
+    return (row[own & ROW_PATTERN] + row[(own >> 56) | ((own >> 40) & 0x4200)] +
+            column[(own & A_FILE) * COLUMN_MAGIC >> 56 & 0xFF] +
+            column[(own >> 7 & A_FILE) * COLUMN_MAGIC >> 56 & 0xFF] -
+            row[opp & ROW_PATTERN] - row[(opp >> 56) | ((opp >> 40) & 0x4200)] -
+            column[(opp & A_FILE) * COLUMN_MAGIC >> 56 & 0xFF] -
+            column[(opp >> 7 & A_FILE) * COLUMN_MAGIC >> 56 & 0xFF])
@@ -0,0 +1,254 @@
+import asyncio
+import time
+from collections import deque
+import pygame
+
+CELL_SIZE = 80
+BOARD_OFFSET_Y = 40
+BOTTOM_BAR_Y = 680
+WIDTH, HEIGHT = 640, 720
+
+FRAME_CAP = 60            # frames per second; None runs uncapped
+FRAME_SAMPLES = 120       # frames averaged by the frame-time instrument
+INSTRUMENT_REFRESH = 0.5  # seconds between updates of the instrument text
+
+GREEN = (0, 100, 0)
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+# Fixed screen regions that are redrawn independently
+TURN_RECT = pygame.Rect(0, BOTTOM_BAR_Y, 135, 40)
+STATUS_RECT = pygame.Rect(135, BOTTOM_BAR_Y, 145, 40)
+TIMER_RECT = pygame.Rect(500, BOTTOM_BAR_Y, 140, 40)
+SCORE_RECT = pygame.Rect(WIDTH - 130, 5, 120, 30)
+OVERLAY_POS = (8, BOARD_OFFSET_Y + 8)
+
+_fonts = {}
+
+
+def get_font(size):
+    # Fonts are loaded once per size
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
+
+def _cell_rect(sq):
+    row, col = divmod(sq, 8)
+    return pygame.Rect(col * CELL_SIZE, BOARD_OFFSET_Y + row * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+
+class Renderer:
+    # Draws the game screen from cached surfaces. Each frame is compared with
+    # the previous one piece by piece (board squares, texts, buttons, score,
+    # overlay) and only the pieces that changed are redrawn and pushed to the
+    # display. next_frame() then sleeps out the rest of the frame instead of
+    # spinning, and records how long the loop was busy.
+
+    def __init__(self, screen, fps=FRAME_CAP):
+        self.screen = screen
+        self.fps = fps
+        self._texts = {}
+        self.background = self._render_background()
+        self._discs = {
+            "black": self._render_circle(BLACK, 30),
+            "white": self._render_circle(WHITE, 30),
+            "move": self._render_circle((200, 200, 200), 10),
+        }
+        self._frame_start = time.perf_counter()
+        self._busy = deque(maxlen=FRAME_SAMPLES)
+        self._frames = deque(maxlen=FRAME_SAMPLES)
+        self._instrument = ""
+        self._instrument_time = 0.0
+        self.invalidate()
+
+    def invalidate(self):
+        # Forget what is on screen; the next draw repaints everything
+        self._full = True
+        self._cells = [None] * 64
+        self._state = None
+        self._parts = {}
+        self._overlay = None
+        self._overlay_rect = None
+
+    # --- Cached surfaces ---
+
+    def _render_background(self):
+        background = pygame.Surface((WIDTH, HEIGHT))
+        background.fill(GREEN)
+        pygame.draw.rect(background, WHITE, (0, 0, WIDTH, BOARD_OFFSET_Y))
+        title_text = get_font(36).render("Othello", True, BLACK)
+        background.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, 5))
+        pygame.draw.rect(background, WHITE, (0, BOTTOM_BAR_Y, WIDTH, HEIGHT - BOTTOM_BAR_Y))
+        for i in range(9):
+            y = BOARD_OFFSET_Y + i * CELL_SIZE
+            pygame.draw.line(background, BLACK, (0, y), (WIDTH, y))
+            pygame.draw.line(background, BLACK, (i * CELL_SIZE, BOARD_OFFSET_Y), (i * CELL_SIZE, BOTTOM_BAR_Y))
+        return background
+
+    def _render_circle(self, color, radius):
+        surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(surface, color, (CELL_SIZE // 2, CELL_SIZE // 2), radius)
+        return surface
+
+    def _text(self, size, text, color):
+        key = (size, text, color)
+        surface = self._texts.get(key)
+        if surface is None:
+            if len(self._texts) > 256:
+                self._texts.clear()  # the timer and status keep producing new strings
+            surface = self._texts[key] = get_font(size).render(text, True, color)
+        return surface
+
+    def _render_overlay(self, lines):
+        rendered = [self._text(22, line, WHITE) for line in lines]
+        width = max(line.get_width() for line in rendered) + 16
+        panel = pygame.Surface((width, len(rendered) * 20 + 12), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, line in enumerate(rendered):
+            panel.blit(line, (8, 6 + i * 20))
+        return panel
+
+    # --- Drawing ---
+
+    def draw(self, state, time_remaining, status=None, back_rect=None, undo_rect=None, overlay=False, stats=None):
+        # Brings the screen up to date for a GameState and returns the
+        # rectangles that changed. Squares are only compared when the state
+        # object changes, i.e. once per move.
+        started = time.perf_counter()
+        screen = self.screen
+        dirty = []
+        if self._full:
+            screen.blit(self.background, (0, 0))
+            dirty.append(screen.get_rect())
+            self._full = False
+
+        # --- Overlay contents ---
+        overlay_surface = None
+        if overlay:
+            lines = (stats.summary_lines() if stats is not None else []) + [self._instrument_text()]
+            key = (id(stats), lines[-1])
+            if self._overlay is not None and self._overlay[0] == key:
+                overlay_surface = self._overlay[1]
+            else:
+                overlay_surface = self._render_overlay(lines)
+        overlay_changed = (overlay_surface is not (self._overlay[1] if self._overlay else None))
+        old_overlay_rect = self._overlay_rect
+        overlay_rect = overlay_surface.get_rect(topleft=OVERLAY_POS) if overlay_surface is not None else None
+
+        # --- Board squares ---
+        position = state.position
+        current_player = state.current_player
+        redrawn = []
+        if state is not self._state or overlay_changed:
+            self._state = state
+            moves = {r * 8 + c for r, c in state.valid_moves}
+            for sq in range(64):
+                bit = 1 << sq
+                disc = "black" if position.black & bit else "white" if position.white & bit else None
+                cell = (disc, sq in moves)
+                rect = _cell_rect(sq)
+                under_overlay = overlay_changed and (
+                    (old_overlay_rect is not None and rect.colliderect(old_overlay_rect)) or
+                    (overlay_rect is not None and rect.colliderect(overlay_rect)))
+                if cell == self._cells[sq] and not under_overlay:
+                    continue
+                self._cells[sq] = cell
+                screen.blit(self.background, rect, rect)
+                if disc is not None:
+                    screen.blit(self._discs[disc], rect)
+                if cell[1]:
+                    screen.blit(self._discs["move"], rect)
+                redrawn.append(rect)
+        dirty.extend(redrawn)
+
+        if overlay_surface is not None and (overlay_changed or any(r.colliderect(overlay_rect) for r in redrawn)):
+            screen.blit(overlay_surface, overlay_rect)
+            dirty.append(overlay_rect)
+        self._overlay = (key, overlay_surface) if overlay_surface is not None else None
+        self._overlay_rect = overlay_rect
+
+        # --- Bottom bar ---
+        self._part(dirty, "turn", TURN_RECT, current_player,
+                   lambda: screen.blit(self._text(28, f"Turn: {current_player.capitalize()}", BLACK), (10, 685)))
+        self._part(dirty, "status", STATUS_RECT, status,
+                   lambda: status and screen.blit(self._text(28, status, (90, 90, 90)), (140, 685)))
+        timer = int(time_remaining)
+        self._part(dirty, "timer", TIMER_RECT, timer,
+                   lambda: screen.blit(self._text(28, f"Timer: {timer // 60}:{timer % 60:02d}", BLACK), (500, 685)))
+
+        # --- Buttons and score ---
+        mx, my = pygame.mouse.get_pos()
+        if back_rect is not None:
+            hover = back_rect.collidepoint(mx, my)
+            self._part(dirty, "back", back_rect, hover,
+                       lambda: self._button(back_rect, (200, 200, 200) if hover else (225, 225, 225), "Back", BLACK))
+        if undo_rect is not None:
+            hover = undo_rect.collidepoint(mx, my)
+            self._part(dirty, "undo", undo_rect, hover,
+                       lambda: self._button(undo_rect, (0, 140, 0) if hover else (0, 100, 0), "Undo", WHITE))
+        self._part(dirty, "score", SCORE_RECT, state.score, lambda: self._score_box(*state.score))
+
+        self._draw_time = time.perf_counter() - started
+        return dirty
+
+    def _part(self, dirty, name, rect, value, paint):
+        # Repaints one fixed region from the background when its value changes
+        if name in self._parts and self._parts[name] == value:
+            return
+        self._parts[name] = value
+        self.screen.set_clip(rect)
+        self.screen.blit(self.background, rect, rect)
+        paint()
+        self.screen.set_clip(None)
+        dirty.append(rect)
+
+    def _button(self, rect, color, label, text_color):
+        pygame.draw.rect(self.screen, color, rect, border_radius=5)
+        text = self._text(30, label, text_color)
+        self.screen.blit(text, text.get_rect(center=rect.center))
+
+    def _score_box(self, black_score, white_score):
+        rect = SCORE_RECT
+        pygame.draw.rect(self.screen, (180, 180, 180), rect, border_radius=5)
+        half_width = rect.width // 2
+        separator_x = rect.x + half_width
+        pygame.draw.line(self.screen, BLACK, (separator_x, rect.y + 5), (separator_x, rect.bottom - 5), 2)
+        black_text = self._text(30, str(black_score), BLACK)
+        white_text = self._text(30, str(white_score), WHITE)
+        self.screen.blit(black_text, black_text.get_rect(center=(rect.x + half_width // 2, rect.centery)))
+        self.screen.blit(white_text, white_text.get_rect(center=(rect.x + half_width + half_width // 2, rect.centery)))
+
+    def present(self, dirty):
+        if dirty:
+            pygame.display.update(dirty)
+
+    # --- Frame pacing and instrument ---
+
+    async def next_frame(self):
+        # Yields to the event loop for the rest of the frame; the AI search
+        # (a task on the same loop, or the worker polling) runs meanwhile
+        now = time.perf_counter()
+        self._busy.append(now - self._frame_start)
+        delay = self._frame_start + 1 / self.fps - now if self.fps else 0
+        await asyncio.sleep(max(0, delay))
+        end = time.perf_counter()
+        self._frames.append(end - self._frame_start)
+        self._frame_start = end
+
+    def frame_stats(self):
+        # (average frame ms, share of the frame the UI loop was busy, fps)
+        total = sum(self._frames)
+        if not total:
+            return 0.0, 0.0, 0.0
+        frames = len(self._frames)
+        return total / frames * 1000, sum(self._busy) / total, frames / total
+
+    def _instrument_text(self):
+        now = time.perf_counter()
+        if now - self._instrument_time >= INSTRUMENT_REFRESH:
+            frame_ms, busy, fps = self.frame_stats()
+            self._instrument = f"UI {fps:.0f} fps, {frame_ms:.1f} ms/frame, busy {busy:.0%} (free {1 - busy:.0%})"
+            self._instrument_time = now
+        return self._instrument
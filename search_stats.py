@@ -0,0 +1,96 @@
+import json
+import time
+from bitboard import square_name
+
+
+class SearchStats:
+    # Counters for one search. minimax_async fills in the per-node counts,
+    # iterative_deepening the per-iteration ones; a finished search returns it
+    # as the third item of its result.
+
+    def __init__(self):
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0  # cutoffs caused by the first move searched
+        self.re_searches = 0         # PVS null-window searches repeated with the full window
+        self.aspiration_failures = 0  # root searches repeated after leaving the aspiration window
+        self.depth = 0
+        self.endgame = False         # solved exactly; depth is then the empties
+        self.iteration_times = []    # seconds for each completed iteration
+        self.iteration_nodes = []    # nodes searched in each completed iteration
+        self.pv = []                 # expected line as squares, starting with the move played
+        self.movegen_time = 0.0
+        self.eval_time = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def effective_branching_factor(self):
+        # Growth in nodes from the second-last to the last iteration
+        if len(self.iteration_nodes) < 2 or not self.iteration_nodes[-2]:
+            return None
+        return self.iteration_nodes[-1] / self.iteration_nodes[-2]
+
+    @property
+    def nodes_per_sec(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def merge(self, other):
+        # Adds the node-level counters of a search run elsewhere (a worker
+        # searching one root move) into this one
+        self.nodes += other.nodes
+        self.leaf_evals += other.leaf_evals
+        self.cutoffs += other.cutoffs
+        self.first_move_cutoffs += other.first_move_cutoffs
+        self.re_searches += other.re_searches
+        self.aspiration_failures += other.aspiration_failures
+        self.movegen_time += other.movegen_time
+        self.eval_time += other.eval_time
+
+    def as_dict(self):
+        return dict(
+            nodes=self.nodes,
+            leaf_evals=self.leaf_evals,
+            cutoffs=self.cutoffs,
+            first_move_cutoff_rate=round(self.first_move_cutoff_rate, 4),
+            re_searches=self.re_searches,
+            aspiration_failures=self.aspiration_failures,
+            depth=self.depth,
+            endgame=self.endgame,
+            effective_branching_factor=self.effective_branching_factor,
+            iteration_times=[round(t, 4) for t in self.iteration_times],
+            iteration_nodes=self.iteration_nodes,
+            movegen_time=round(self.movegen_time, 4),
+            eval_time=round(self.eval_time, 4),
+            elapsed=round(self.elapsed, 4),
+            nodes_per_sec=round(self.nodes_per_sec),
+            pv=[square_name(sq) for sq in self.pv],
+        )
+
+    def summary_lines(self):
+        # Short text lines for an on-screen overlay
+        ebf = self.effective_branching_factor
+        elapsed = self.elapsed or 1e-9
+        lines = [
+            f"Depth {self.depth}" + (" (exact endgame)" if self.endgame else ""),
+            f"Nodes {self.nodes:,} ({self.nodes_per_sec:,.0f}/s)",
+            f"Leaf evals {self.leaf_evals:,}",
+            f"Cutoffs {self.cutoffs:,}, first move {self.first_move_cutoff_rate:.0%}",
+            f"EBF {ebf:.2f}" if ebf is not None else "EBF -",
+            f"Movegen {self.movegen_time / elapsed:.0%}  Eval {self.eval_time / elapsed:.0%}",
+        ]
+        if self.iteration_times:
+            lines.append("Iterations " + " ".join(f"{t:.2f}" for t in self.iteration_times[-5:]) + "s")
+        return lines
+
+
+def append_search_log(path, stats, **fields):
+    # One JSON object per line; extra fields (colour, move, ...) go first
+    record = dict(time=round(time.time(), 3), **fields)
+    record.update(stats.as_dict())
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
@@ -0,0 +1,127 @@
+import time
+from endgame import ENDGAME_EMPTIES
+
+# Time control: a game clock with a total budget plus increment, and the
+# per-move allocation that spends it. Every move gets a target time and a hard
+# maximum. The target is weighted toward the midgame and shrinks when there
+# are few legal moves to choose from. While searching, the target stretches
+# when the best move keeps changing between iterations and shrinks when it is
+# stable. Time left unused stays on the clock, so later moves are allocated
+# more.
+
+OPENING_EMPTIES = 38          # more empties than this is the opening
+PHASE_FACTORS = {"opening": 0.6, "midgame": 1.4, "endgame": 1.0}
+MIN_MOVES_LEFT = 8            # own moves assumed left, at least, when sharing out the clock
+INCREMENT_SHARE = 0.8         # part of the increment spent on the move that earns it
+MAX_STRETCH = 3.0             # maximum time as a multiple of the target
+MAX_SHARE = 0.15              # maximum time as a share of the remaining clock
+SAFETY_MARGIN = 0.2           # seconds never allocated (transfer and start-up overhead)
+MIN_MOVE_TIME = 0.05
+UNSTABLE_FACTOR = 1.6         # target multiplier while the best move is still changing
+STABLE_FACTOR = 0.5           # target multiplier once the best move is settled
+STABLE_ITERATIONS = 3         # iterations with the same best move that count as settled
+MIN_GROWTH = 2.0              # assumed growth of the next iteration over the last, at least
+
+
+class TimeControl:
+    # Total budget and increment per move, in seconds
+    def __init__(self, base, increment=0.0):
+        self.base = base
+        self.increment = increment
+
+    @classmethod
+    def parse(cls, spec):
+        # "minutes+seconds", e.g. "5+3"; "5" has no increment
+        minutes, _, increment = spec.partition("+")
+        return cls(float(minutes) * 60, float(increment or 0))
+
+    def __repr__(self):
+        return f"{self.base / 60:g}+{self.increment:g}"
+
+
+class GameClock:
+    # Remaining time of both sides. start(color) is pressing the clock: it
+    # ends the running side's turn, charging its time and adding the
+    # increment, and starts color's turn.
+    def __init__(self, control, now=time.monotonic):
+        self.control = control
+        self.now = now
+        self.left = {"black": control.base, "white": control.base}
+        self.running = None
+        self.turn_start = None
+
+    def start(self, color):
+        self.stop()
+        self.running = color
+        self.turn_start = self.now()
+
+    def stop(self):
+        # Ends the running turn; returns the seconds it took
+        if self.running is None:
+            return 0.0
+        used = self.now() - self.turn_start
+        self.left[self.running] += self.control.increment - used
+        self.running = None
+        return used
+
+    def remaining(self, color):
+        # Live: includes the running turn so far
+        left = self.left[color]
+        if color == self.running:
+            left -= self.now() - self.turn_start
+        return left
+
+
+# --- Allocation ---
+
+def game_phase(empties):
+    if empties > OPENING_EMPTIES:
+        return "opening"
+    if empties > ENDGAME_EMPTIES:
+        return "midgame"
+    return "endgame"
+
+
+def allocate(remaining, increment, empties, num_moves):
+    # MoveBudget for a move with `remaining` seconds on the clock, `empties`
+    # empty squares and `num_moves` legal moves
+    available = max(0.0, remaining - SAFETY_MARGIN)
+    moves_left = max(MIN_MOVES_LEFT, (empties + 1) // 2)
+    target = available / moves_left + increment * INCREMENT_SHARE
+    target *= PHASE_FACTORS[game_phase(empties)]
+    # Fewer candidate moves are easier to tell apart
+    target *= min(1.0, (num_moves + 2) / 10)
+    maximum = max(MIN_MOVE_TIME, min(target * MAX_STRETCH, available * MAX_SHARE + increment * INCREMENT_SHARE))
+    return MoveBudget(max(MIN_MOVE_TIME, min(target, maximum)), maximum)
+
+
+class MoveBudget:
+    # Time for one move: the search aborts at `maximum` (its time_limit) and
+    # asks keep_searching after every iteration whether to go one deeper.
+    # Plain attributes only, so it can be sent to a worker process.
+    def __init__(self, target, maximum):
+        self.target = target
+        self.maximum = maximum
+        self.best_move = None
+        self.stable = 0  # iterations in a row that kept the best move
+        self.last_iteration = None
+
+    def keep_searching(self, move, elapsed, iteration_time):
+        if move == self.best_move:
+            self.stable += 1
+        else:
+            self.best_move = move
+            self.stable = 0
+        if self.stable >= STABLE_ITERATIONS:
+            limit = self.target * STABLE_FACTOR
+        elif self.stable == 0:
+            limit = self.target * UNSTABLE_FACTOR
+        else:
+            limit = self.target
+        # An iteration that cannot finish before the maximum would only be
+        # thrown away, so the next one is estimated from the growth so far
+        growth = MIN_GROWTH
+        if self.last_iteration:
+            growth = max(growth, iteration_time / self.last_iteration)
+        self.last_iteration = iteration_time
+        return elapsed < limit and elapsed + iteration_time * growth <= self.maximum
@@ -0,0 +1,83 @@
+import random
+from bitboard import iter_squares
+
+# --- Zobrist keys ---
+# Fixed seed so hashes are stable between runs (and between processes).
+_rng = random.Random(0x07E1)
+ZOBRIST_BLACK = [_rng.getrandbits(64) for _ in range(64)]
+ZOBRIST_WHITE = [_rng.getrandbits(64) for _ in range(64)]
+ZOBRIST_FLIP = [b ^ w for b, w in zip(ZOBRIST_BLACK, ZOBRIST_WHITE)]  # disc changing colour
+ZOBRIST_WHITE_TO_MOVE = _rng.getrandbits(64)
+ZOBRIST_AI_WHITE = _rng.getrandbits(64)  # scores are stored from the AI's side
+
+# Bound types
+EXACT = 0
+LOWER = 1  # score is at least this (fail high)
+UPPER = 2  # score is at most this (fail low)
+
+DEFAULT_TT_MB = 16
+ENTRY_BYTES = 128  # rough size of one stored tuple plus its list slot
+
+
+def zobrist_hash(position, to_move, ai_color="black"):
+    key = 0
+    for sq in iter_squares(position.black):
+        key ^= ZOBRIST_BLACK[sq]
+    for sq in iter_squares(position.white):
+        key ^= ZOBRIST_WHITE[sq]
+    if to_move == "white":
+        key ^= ZOBRIST_WHITE_TO_MOVE
+    if ai_color == "white":
+        key ^= ZOBRIST_AI_WHITE
+    return key
+
+
+def update_hash(key, sq, flips, player):
+    # Incremental update for `player` placing a disc on `sq` and flipping `flips`;
+    # also hands the move to the other side.
+    key ^= (ZOBRIST_BLACK if player == "black" else ZOBRIST_WHITE)[sq] ^ ZOBRIST_WHITE_TO_MOVE
+    for f in iter_squares(flips):
+        key ^= ZOBRIST_FLIP[f]
+    return key
+
+
+class TranspositionTable:
+    # Fixed-size, direct-mapped table. Each slot holds one entry tuple:
+    # (key, depth, bound, score, best_square, age)
+
+    def __init__(self, size_mb=DEFAULT_TT_MB):
+        size = 1
+        while size * 2 * ENTRY_BYTES <= size_mb * 1024 * 1024:
+            size *= 2
+        self.size = size
+        self.mask = size - 1
+        self.entries = [None] * size
+        self.age = 0
+        self.hits = 0
+        self.stores = 0
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.age = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        # Entries from older searches become the first to be replaced
+        self.age += 1
+
+    def probe(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, bound, score, best_square):
+        slot = key & self.mask
+        old = self.entries[slot]
+        # Depth-preferred replacement, but stale entries from earlier searches
+        # and the same position are always overwritten.
+        if old is None or old[0] == key or old[5] != self.age or depth >= old[1]:
+            self.entries[slot] = (key, depth, bound, score, best_square, self.age)
+            self.stores += 1
@@ -0,0 +1,192 @@
+import argparse
+import json
+import math
+import time
+try:
+    import numpy as np
+except ImportError as exc:
+    raise ImportError("tuning needs NumPy >= 2.0: pip install numpy, or install the 'analysis' extra") from exc
+from batch_eval import features_bitboards, phase_indexes
+from bitboard import replay_moves
+from game_record import GameDatabase, from_transcript
+from minimax_ai import DEFAULT_PHASE_WEIGHTS, PHASE_WEIGHTS, WEIGHTS_PATH
+
+# Texel-style tuning of the evaluate_board weights. Every position of a set of
+# finished games is labelled with the game's result for black (1, 0.5, 0).
+# The evaluation, squashed by sigmoid(K * eval), should predict that result;
+# K is fitted first with the current weights so the scale of the scores stays
+# the same, then all 15 weights are fitted with Adam on the mean squared
+# error. Features come from batch_eval in one vectorized pass and the fit
+# works on contiguous per-phase slices, so millions of positions take a few
+# minutes at most.
+#
+#   python tuning.py extract --db games.db --output positions.npz
+#   python tuning.py fit positions.npz            (writes weights.json)
+
+FEATURES = ("piece difference", "mobility", "corner control", "edge control", "nearby corners")
+
+
+# --- Labelled positions ---
+
+def game_bitboards(moves, min_ply=0):
+    # (black, white) bitboards of every position of a game from min_ply on,
+    # then the final disc difference for black. Moves are trusted (they come
+    # from a game record), so only passes are checked.
+    boards = []
+    for ply, (position, _, sq) in enumerate(replay_moves(moves, check=False)):
+        if ply >= min_ply or sq is None:
+            boards.append((position.black, position.white))
+    return boards, position.black.bit_count() - position.white.bit_count()
+
+
+def extract_positions(games, min_ply=0, min_empties=0):
+    # Arrays (black, white, result) over all positions of the games; result is
+    # 1 / 0.5 / 0 from black's side
+    black, white, result = [], [], []
+    for moves in games:
+        boards, disc_diff = game_bitboards(moves, min_ply)
+        label = 1.0 if disc_diff > 0 else 0.0 if disc_diff < 0 else 0.5
+        for b, w in boards:
+            if 64 - (b | w).bit_count() >= min_empties:
+                black.append(b)
+                white.append(w)
+                result.append(label)
+    return (np.array(black, dtype=np.uint64), np.array(white, dtype=np.uint64),
+            np.array(result, dtype=np.float32))
+
+
+def load_dataset(path):
+    data = np.load(path)
+    return data["black"], data["white"], data["result"]
+
+
+# --- Fitting ---
+
+class Dataset:
+    # Features grouped by phase: for phase p, features[p] is an (n_p, 5)
+    # float64 array and results[p] the matching labels
+    def __init__(self, black, white, result):
+        phase = phase_indexes(black, white)
+        features = features_bitboards(black, white).astype(np.float64)
+        self.size = len(result)
+        self.features = [features[phase == p] for p in range(3)]
+        self.results = [result[phase == p].astype(np.float64) for p in range(3)]
+
+    def evals(self, weights):
+        return [f @ w for f, w in zip(self.features, weights)]
+
+    def error(self, weights, k):
+        # Mean squared error of sigmoid(k * eval) against the results
+        total = 0.0
+        for e, y in zip(self.evals(weights), self.results):
+            total += np.sum((_sigmoid(k * e) - y) ** 2)
+        return total / self.size
+
+    def gradient(self, weights, k):
+        # d error / d weights, shape (3, 5)
+        grad = np.zeros((3, 5))
+        for p, (e, y) in enumerate(zip(self.evals(weights), self.results)):
+            s = _sigmoid(k * e)
+            grad[p] = self.features[p].T @ ((s - y) * s * (1 - s)) * (2 * k / self.size)
+        return grad
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def fit_k(data, weights, lo=1e-5, hi=1.0, iterations=60):
+    # Golden-section search for the K minimizing the error, on a log scale
+    ratio = (math.sqrt(5) - 1) / 2
+    a, b = math.log(lo), math.log(hi)
+    for _ in range(iterations):
+        c, d = b - ratio * (b - a), a + ratio * (b - a)
+        if data.error(weights, math.exp(c)) < data.error(weights, math.exp(d)):
+            b = d
+        else:
+            a = c
+    return math.exp((a + b) / 2)
+
+
+def fit_weights(data, weights, k, iterations=1000, learning_rate=1.0, on_step=None):
+    # Adam on the 15 weights; the step size decays linearly to a tenth
+    w = np.array(weights, dtype=np.float64)
+    m, v = np.zeros_like(w), np.zeros_like(w)
+    beta1, beta2, eps = 0.9, 0.999, 1e-12
+    for t in range(1, iterations + 1):
+        grad = data.gradient(w, k)
+        m = beta1 * m + (1 - beta1) * grad
+        v = beta2 * v + (1 - beta2) * grad ** 2
+        rate = learning_rate * (1 - 0.9 * t / iterations)
+        w -= rate * (m / (1 - beta1 ** t)) / (np.sqrt(v / (1 - beta2 ** t)) + eps)
+        if on_step is not None:
+            on_step(t, w)
+    return w
+
+
+def write_weights(path, weights, **info):
+    record = dict(phases=[[int(x) for x in phase] for phase in weights], features=list(FEATURES), **info)
+    # One key per line, so the phases read as a 3 x 5 table
+    with open(path, "w") as f:
+        f.write("{\n" + ",\n".join(f"  {json.dumps(key)}: {json.dumps(value)}" for key, value in record.items()) + "\n}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the evaluate_board weights on labelled game positions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract = commands.add_parser("extract", help="write the positions of finished games to an .npz file")
+    extract.add_argument("--db", default=None, help="game database (default: the one the UI records to)")
+    extract.add_argument("--transcripts", default=None, help="text file with one game transcript per line")
+    extract.add_argument("--output", default="positions.npz")
+    extract.add_argument("--min-ply", type=int, default=0, help="skip the first plies of every game")
+    extract.add_argument("--min-empties", type=int, default=0,
+                         help="skip positions with fewer empties (e.g. those the endgame solver handles)")
+
+    fit = commands.add_parser("fit", help="fit the weights and write a weights file")
+    fit.add_argument("positions", help=".npz file from extract")
+    fit.add_argument("--output", default=WEIGHTS_PATH)
+    fit.add_argument("--iterations", type=int, default=1000)
+    fit.add_argument("--learning-rate", type=float, default=1.0, help="Adam step, in weight units")
+    fit.add_argument("--from-defaults", action="store_true",
+                     help="start from the built-in weights instead of the current weights file")
+
+    args = parser.parse_args()
+    start = time.time()
+    if args.command == "extract":
+        games = []
+        if args.transcripts:
+            with open(args.transcripts) as f:
+                games.extend(from_transcript(line.strip()) for line in f if line.strip())
+        if args.db or not args.transcripts:
+            db = GameDatabase(args.db) if args.db else GameDatabase()
+            games.extend(bytes(moves) for moves in db)
+            db.close()
+        black, white, result = extract_positions(games, args.min_ply, args.min_empties)
+        np.savez(args.output, black=black, white=white, result=result)
+        print(f"{len(result):,} positions from {len(games):,} games -> {args.output} ({time.time() - start:.1f}s)")
+
+    elif args.command == "fit":
+        initial = DEFAULT_PHASE_WEIGHTS if args.from_defaults else PHASE_WEIGHTS
+        data = Dataset(*load_dataset(args.positions))
+        print(f"{data.size:,} positions, features in {time.time() - start:.1f}s")
+        k = fit_k(data, initial)
+        before = data.error(initial, k)
+        print(f"K = {k:.6f}, error {before:.6f} with the starting weights")
+
+        def progress(t, w):
+            if t % 100 == 0:
+                print(f"  iteration {t}: error {data.error(w, k):.6f}")
+
+        tuned = fit_weights(data, initial, k, args.iterations, args.learning_rate, progress)
+        rounded = np.rint(tuned)
+        after = data.error(rounded, k)
+        for phase, name in enumerate(("opening", "midgame", "endgame")):
+            print(f"  {name:<8} " + " ".join(f"{int(x):>5}" for x in rounded[phase]))
+        print(f"error {before:.6f} -> {after:.6f} in {time.time() - start:.1f}s")
+        write_weights(args.output, rounded, k=k, error=after, positions=data.size)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()